@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+"""Compare amenity filters run by scanning and with storage.filter.
+
+Usage: ./benchmarks/bench_amenities.py [count]
+
+Stores count places (200k by default), each with a random price and up
+to ten of 40 amenities, then times finding the places holding three
+given amenities, alone and with a price bound, as a scan of
+storage.all(Place) and with storage.filter, and the cost of keeping the
+bitmaps up to date as amenities change.
+"""
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+AMENITIES = ["amenity{}".format(i) for i in range(40)]
+
+
+def timed(func, repeat=20):
+    """Return the result of func and its mean time of repeat runs in ms."""
+    start = perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (perf_counter() - start) / repeat * 1e3
+
+
+def scan(storage, wanted, price=None):
+    """Return the keys of the places holding every amenity of wanted,
+    priced at most price."""
+    return {key for key, obj in storage.all(Place).items()
+            if set(wanted) <= set(obj.amenity_ids) and
+            (price is None or obj.price_by_night <= price)}
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        storage = FileStorage()
+        places = []
+        for _ in range(count):
+            pl = Place()
+            pl.amenity_ids = random.sample(AMENITIES, random.randint(0, 10))
+            pl.price_by_night = random.randint(20, 500)
+            places.append(pl)
+        wanted = AMENITIES[:3]
+        start = perf_counter()
+        storage.filter(Place, amenity_ids__contains=wanted)
+        print("bitmaps of {} places built in {:.2f} s".format(
+            count, perf_counter() - start))
+        for price in (None, 100):
+            lookups = {"amenity_ids__contains": wanted}
+            if price is not None:
+                lookups["price_by_night__lte"] = price
+                storage.filter(Place, **lookups)
+            expected, scan_ms = timed(lambda: scan(storage, wanted, price), 3)
+            found, filter_ms = timed(lambda: storage.filter(Place, **lookups))
+            assert set(found) == expected
+            print("{} places with 3 amenities{}".format(
+                len(found), "" if price is None else ", <= 100"))
+            print("  scan   {:8.2f} ms".format(scan_ms))
+            print("  filter {:8.2f} ms  {:.0f}x".format(
+                filter_ms, scan_ms / filter_ms))
+        start = perf_counter()
+        for pl in random.sample(places, 1000):
+            pl.amenity_ids = random.sample(AMENITIES, 5)
+        storage.filter(Place, amenity_ids__contains=wanted)
+        print("1000 amenity changes reindexed in {:.2f} ms".format(
+            (perf_counter() - start) * 1e3))
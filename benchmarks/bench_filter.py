@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+"""Compare filtering places by scanning storage.all() and with filter.
+
+Usage: ./benchmarks/bench_filter.py [count]
+
+Stores count places (100k by default) with random prices and guest
+counts, then times "price_by_night <= 100 and max_guest >= 4" as a
+Python loop over storage.all(Place) and as storage.filter, which runs
+over the columns of the numeric fields.
+"""
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine import indexes
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def best_of(func, repeat=5):
+    """Return the result of func and its best time of repeat runs in ms."""
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func()
+        times.append(perf_counter() - start)
+    return result, min(times) * 1e3
+
+
+def scan(storage):
+    """Return the matching places by testing every object."""
+    return {key: obj for key, obj in storage.all(Place).items()
+            if obj.price_by_night <= 100 and obj.max_guest >= 4}
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        storage = FileStorage()
+        for _ in range(count):
+            pl = Place()
+            pl.price_by_night = random.randint(20, 500)
+            pl.max_guest = random.randint(1, 10)
+        start = perf_counter()
+        storage.filter(Place, max_guest=0)
+        print("column store built in {:.0f} ms".format(
+            (perf_counter() - start) * 1e3))
+        expected, scan_ms = best_of(lambda: scan(storage))
+        found, filter_ms = best_of(lambda: storage.filter(
+            Place, price_by_night__lte=100, max_guest__gte=4))
+        assert found == expected
+        print("{} of {} places match (NumPy: {})".format(
+            len(found), count, "yes" if indexes.numpy else "no"))
+        print("scan   {:7.2f} ms".format(scan_ms))
+        print("filter {:7.2f} ms  {:.1f}x".format(
+            filter_ms, scan_ms / filter_ms))
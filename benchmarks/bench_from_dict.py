@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""Compare building stored objects with cls(**kwargs) and from_dict.
+
+Usage: ./benchmarks/bench_from_dict.py [count]
+
+Builds count objects (100k by default) of every model class from their
+to_dict() form both ways and prints the cost per object, then times a
+FileStorage.reload of count places.
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+
+
+def per_object(func, dicts):
+    """Return the time in microseconds func takes per dict of dicts."""
+    start = perf_counter()
+    for obj_dict in dicts:
+        func(dict(obj_dict))
+    return (perf_counter() - start) / len(dicts) * 1e6
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        for cls in (BaseModel, User, State, City, Place, Amenity, Review):
+            dicts = [cls().to_dict() for _ in range(min(count, 10000))]
+            for obj_dict in dicts:
+                del obj_dict["__class__"]
+            FileStorage._FileStorage__objects = {}
+            init = per_object(lambda d: cls(**d), dicts)
+            fast = per_object(cls.from_dict, dicts)
+            print("{:<9} __init__ {:6.2f} us  from_dict {:6.2f} us"
+                  "  {:5.1f}x".format(cls.__name__, init, fast, init / fast))
+        for i in range(count):
+            Place().name = "place {}".format(i)
+        FileStorage().save()
+        FileStorage._FileStorage__objects = {}
+        start = perf_counter()
+        FileStorage().reload()
+        print("reload of {} places {:.2f} s".format(
+            count, perf_counter() - start))
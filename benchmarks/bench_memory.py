@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""Compare the memory taken by plain and compact model objects.
+
+Usage: ./benchmarks/bench_memory.py [count]
+
+Runs itself once with HBNB_COMPACT_MODELS=0 and once with =1, and in
+each builds count objects (100k by default) of Place and Review, every
+field set, as a reload would, printing the bytes allocated per object.
+"""
+import os
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLES = {str: "sample", int: 3, float: 1.5, list: []}
+
+
+def measure(count):
+    """Print the bytes per object of count Place and Review objects."""
+    from models.place import Place
+    from models.review import Review
+
+    mode = "compact" if Place.__compact__ else "plain"
+    for cls in (Place, Review):
+        obj_dict = {"created_at": "2017-09-28T21:03:54.052298",
+                    "updated_at": "2017-09-28T21:03:54.052302"}
+        for name, field in cls.__fields__.items():
+            obj_dict[name] = SAMPLES[field.type]
+        dicts = []
+        for i in range(count):
+            dicts.append(dict(obj_dict, id=str(i)))
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        objs = [cls.from_dict(d) for d in dicts]
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print("{:<7} {:<6} {:6.0f} bytes/object".format(
+            mode, cls.__name__, (after - before) / len(objs)))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    if os.environ.get("BENCH_MEMORY_CHILD"):
+        measure(count)
+        sys.exit(0)
+    for compact in ("0", "1"):
+        env = dict(os.environ, HBNB_COMPACT_MODELS=compact,
+                   BENCH_MEMORY_CHILD="1")
+        subprocess.run([sys.executable, os.path.abspath(__file__),
+                        str(count)], env=env, check=True)
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Compare price range pages read by sorting a scan and with ordered.
+
+Usage: ./benchmarks/bench_ordered.py [count]
+
+Stores count places (200k by default) with random prices, then times
+the third page of 20 places priced 50 to 120 by increasing price, as a
+scan of storage.all(Place) plus a sort and with storage.ordered, and
+the cost of keeping the index up to date as prices change.
+"""
+import os
+import random
+import sys
+import tempfile
+from itertools import islice
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def timed(func, repeat=20):
+    """Return the result of func and its mean time of repeat runs in ms."""
+    start = perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (perf_counter() - start) / repeat * 1e3
+
+
+def scan(storage):
+    """Return the page by sorting the matching places."""
+    objs = [obj for obj in storage.all(Place).values()
+            if 50 <= obj.price_by_night <= 120]
+    objs.sort(key=lambda obj: (obj.price_by_night, obj.id))
+    return objs[40:60]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        storage = FileStorage()
+        places = []
+        for _ in range(count):
+            pl = Place()
+            pl.price_by_night = random.randint(20, 500)
+            places.append(pl)
+        start = perf_counter()
+        next(storage.ordered(Place, "price_by_night"))
+        print("index of {} places built in {:.2f} s".format(
+            count, perf_counter() - start))
+        expected, scan_ms = timed(lambda: scan(storage), 3)
+        found, ordered_ms = timed(lambda: list(storage.ordered(
+            Place, "price_by_night", 50, 120, offset=40, limit=20)))
+        assert found == expected
+        print("scan and sort {:8.2f} ms".format(scan_ms))
+        print("ordered       {:8.2f} ms  {:.0f}x".format(
+            ordered_ms, scan_ms / ordered_ms))
+        start = perf_counter()
+        for pl in random.sample(places, 1000):
+            pl.price_by_night = random.randint(20, 500)
+        next(storage.ordered(Place, "price_by_night"))
+        print("1000 price changes reindexed in {:.2f} ms".format(
+            (perf_counter() - start) * 1e3))
+        start = perf_counter()
+        total = sum(1 for _ in islice(storage.ordered(
+            Place, "price_by_night"), count))
+        print("ordered iteration of {} places {:.2f} s".format(
+            total, perf_counter() - start))
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""Measure FileStorage.reload time against the number of workers.
+
+Usage: ./benchmarks/bench_parallel_reload.py [count] [workers ...]
+
+Saves count objects (200k by default) in a temporary directory, then
+times a reload with each worker count (1, 2, 4, ... up to the number of
+CPUs by default) and prints the speedup over the single-process reload.
+"""
+import gc
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def timed_reload(workers):
+    """Return the wall-clock time of a reload with workers processes."""
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__cache = {}
+    gc.collect()
+    start = perf_counter()
+    FileStorage(workers=workers).reload()
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    workers = [int(arg) for arg in sys.argv[2:]]
+    if not workers:
+        workers = [1]
+        while workers[-1] * 2 <= (os.cpu_count() or 1):
+            workers.append(workers[-1] * 2)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        for i in range(count):
+            place = Place()
+            place.name = "place {}".format(i)
+            place.number_rooms = i % 7
+        FileStorage().save()
+        base = None
+        for n in workers:
+            elapsed = timed_reload(n)
+            base = base or elapsed
+            print("{:>3} workers {:8.2f} s  speedup {:5.2f}x".format(
+                n, elapsed, base / elapsed))
@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Compare queries written by hand over storage.all with storage.query.
+
+Usage: ./benchmarks/bench_query.py [count]
+
+Stores count places (200k by default) spread over 500 cities, then
+times three queries both ways: the 20 cheapest places of a city under
+a price, a page of places in a price range by decreasing price, and
+the places with two amenities under a price. The plan of each query is
+printed with its times.
+"""
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+AMENITIES = ["amenity{}".format(i) for i in range(40)]
+
+
+def timed(func, repeat=20):
+    """Return the result of func and its mean time of repeat runs in ms."""
+    start = perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (perf_counter() - start) / repeat * 1e3
+
+
+def by_city(storage):
+    """Return the 20 cheapest places of city0 priced at most 300."""
+    objs = [obj for obj in storage.all(Place).values()
+            if obj.city_id == "city0" and obj.price_by_night <= 300]
+    objs.sort(key=lambda obj: (obj.price_by_night, obj.id))
+    return objs[:20]
+
+
+def by_price(storage):
+    """Return the third page of 20 places priced 100 to 200, most
+    expensive first."""
+    objs = [obj for obj in storage.all(Place).values()
+            if 100 <= obj.price_by_night <= 200]
+    objs.sort(key=lambda obj: (obj.price_by_night, obj.id), reverse=True)
+    return objs[40:60]
+
+
+def by_amenities(storage):
+    """Return the places with amenity0 and amenity1 priced under 60."""
+    return [obj for obj in storage.all(Place).values()
+            if "amenity0" in obj.amenity_ids and
+            "amenity1" in obj.amenity_ids and obj.price_by_night < 60]
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        storage = FileStorage()
+        for _ in range(count):
+            pl = Place()
+            pl.city_id = "city{}".format(random.randrange(500))
+            pl.price_by_night = random.randint(20, 500)
+            pl.amenity_ids = random.sample(AMENITIES, random.randint(0, 10))
+        queries = (
+            (by_city, storage.query(Place).where(
+                city_id="city0", price_by_night__lte=300).order_by(
+                    "price_by_night").limit(20)),
+            (by_price, storage.query(Place).where(
+                price_by_night__gte=100, price_by_night__lte=200).order_by(
+                    "-price_by_night").offset(40).limit(20)),
+            (by_amenities, storage.query(Place).where(
+                amenity_ids__contains=["amenity0", "amenity1"],
+                price_by_night__lt=60)))
+        for by_hand, query in queries:
+            start = perf_counter()
+            list(query)
+            build_ms = (perf_counter() - start) * 1e3
+            expected, hand_ms = timed(lambda: by_hand(storage), 3)
+            found, query_ms = timed(lambda: list(query))
+            assert found == expected or set(found) == set(expected)
+            print(query.explain())
+            print("  by hand {:8.2f} ms".format(hand_ms))
+            print("  query   {:8.2f} ms  {:.0f}x (first run {:.0f} ms)".format(
+                query_ms, hand_ms / query_ms, build_ms))
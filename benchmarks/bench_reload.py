@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""Compare the peak memory of FileStorage.reload with a json.load reload.
+
+Usage: ./benchmarks/bench_reload.py [count]
+
+Saves count objects (50k by default) in a temporary directory, then
+reloads them twice under tracemalloc: once by loading the whole file
+with json.load as reload used to, once with the streaming reload.
+"""
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def json_load_reload():
+    """Reload file.json the way FileStorage did before streaming."""
+    objects = {}
+    with open("file.json") as file:
+        obj_dict = json.load(file)
+        for obj_key, obj_data in obj_dict.items():
+            del obj_data["__class__"]
+            objects[obj_key] = Place(**obj_data)
+    return objects
+
+
+def streaming_reload():
+    """Reload file.json with FileStorage.reload."""
+    FileStorage._FileStorage__objects = {}
+    FileStorage().reload()
+    return FileStorage._FileStorage__objects
+
+
+def measure(name, func):
+    """Print the time, final and peak traced memory of func()."""
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__cache = {}
+    gc.collect()
+    tracemalloc.start()
+    start = perf_counter()
+    result = func()
+    elapsed = perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{:<10} {:8.2f} s  steady {:8.1f} MiB  peak {:8.1f} MiB"
+          "  peak/steady {:.2f}".format(name, elapsed, current / 2 ** 20,
+                                       peak / 2 ** 20, peak / current))
+    return result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        for i in range(count):
+            place = Place()
+            place.name = "place {}".format(i)
+            place.description = "x" * 80
+        FileStorage().save()
+        measure("json.load", json_load_reload)
+        measure("streaming", streaming_reload)
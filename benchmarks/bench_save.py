@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Measure FileStorage save latency for each durability level.
+
+Usage: ./benchmarks/bench_save.py [count ...]
+
+For every dataset size (10k, 100k and 1M objects by default) it times a
+full snapshot save, a snapshot save after a one-object change and a
+journal append of a one-object change, at each durability level.
+Run it from the repository root; it works in a temporary directory.
+"""
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.base_model import BaseModel
+from models.engine.file_storage import FileStorage
+
+
+def timed(func):
+    """Return the wall-clock time of func() in milliseconds."""
+    start = perf_counter()
+    func()
+    return (perf_counter() - start) * 1000
+
+
+def run(count):
+    """Print the save latencies for a store of count objects."""
+    FileStorage._FileStorage__objects = {}
+    FileStorage._FileStorage__cache = {}
+    objs = [BaseModel() for _ in range(count)]
+    for level in FileStorage.durability_levels:
+        snapshot = FileStorage(durability=level)
+        FileStorage._FileStorage__cache.clear()
+        full = timed(snapshot.save)
+        objs[0].name = level
+        one = timed(snapshot.save)
+        journal = FileStorage(journal=True, durability=level,
+                              compact_ratio=None)
+        objs[0].name = level + "!"
+        append = timed(journal.save)
+        print("{:>9} {:>7} full {:9.1f} ms  one-change {:9.1f} ms"
+              "  journal {:7.2f} ms".format(count, level, full, one, append))
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        for count in counts:
+            run(count)
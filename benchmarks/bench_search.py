@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Compare searching review texts by scanning and with storage.search.
+
+Usage: ./benchmarks/bench_search.py [count]
+
+Stores count reviews (100k by default) of random words, then times
+finding the reviews holding two words, as a scan of storage.all(Review)
+and with storage.search, and the first search after a lazy reload with
+and without the index saved with the snapshot.
+"""
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.engine.indexes import tokenize
+from models.review import Review
+
+WORDS = ["word{}".format(i) for i in range(5000)]
+
+
+def timed(func, repeat=20):
+    """Return the result of func and its mean time of repeat runs in ms."""
+    start = perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (perf_counter() - start) / repeat * 1e3
+
+
+def scan(storage, query):
+    """Return the keys of the reviews holding every word of query."""
+    words = set(tokenize(query))
+    return {key for key, obj in storage.all(Review).items()
+            if words <= set(tokenize(obj.text))}
+
+
+def first_search(query):
+    """Return the time in s of a lazy reload and a search of query."""
+    FileStorage._FileStorage__objects = {}
+    start = perf_counter()
+    storage = FileStorage(lazy=True)
+    storage.reload()
+    storage.search(query, Review)
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        storage = FileStorage()
+        for _ in range(count):
+            rv = Review()
+            rv.text = " ".join(random.choices(WORDS, k=30))
+        query = "word7 word42"
+        start = perf_counter()
+        storage.search(query, Review)
+        print("index of {} reviews built in {:.2f} s".format(
+            count, perf_counter() - start))
+        expected, scan_ms = timed(lambda: scan(storage, query), 3)
+        found, search_ms = timed(lambda: storage.search(query, Review, k=None))
+        assert expected <= set(found)
+        print("scan   {:8.2f} ms".format(scan_ms))
+        print("search {:8.2f} ms  {:.0f}x".format(
+            search_ms, scan_ms / search_ms))
+        storage.save()
+        print("lazy reload and first search, saved index  {:.2f} s".format(
+            first_search(query)))
+        os.remove("file.json.text")
+        print("lazy reload and first search, rebuilt      {:.2f} s".format(
+            first_search(query)))
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+"""Time bounding-box and nearest queries on places.
+
+Usage: ./benchmarks/bench_spatial.py [count]
+
+Stores count places (1M by default) spread around 50 random cities,
+then times map-view sized bounding boxes and top-10 nearest queries
+around random cities, with storage.within and storage.nearest against
+a scan of storage.all(Place).
+"""
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.engine.indexes import haversine
+from models.place import Place
+
+
+def timed(func, args_list):
+    """Return the mean time in ms of func over every args of args_list."""
+    start = perf_counter()
+    for args in args_list:
+        func(*args)
+    return (perf_counter() - start) / len(args_list) * 1e3
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    random.seed(0)
+    cities = [(random.uniform(-60, 70), random.uniform(-180, 180))
+              for _ in range(50)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        storage = FileStorage()
+        for _ in range(count):
+            lat, lon = random.choice(cities)
+            pl = Place()
+            pl.latitude = random.gauss(lat, 0.3)
+            pl.longitude = random.gauss(lon, 0.3)
+        start = perf_counter()
+        storage.within(Place, 0, 0, 0, 0)
+        print("grid of {} places built in {:.2f} s".format(
+            count, perf_counter() - start))
+        boxes = []
+        points = []
+        for _ in range(50):
+            lat, lon = random.choice(cities)
+            lat += random.uniform(-0.3, 0.3)
+            lon += random.uniform(-0.3, 0.3)
+            boxes.append((lat - 0.05, lon - 0.1, lat + 0.05, lon + 0.1))
+            points.append((lat, lon))
+        hits = sum(len(storage.within(Place, *box)) for box in boxes)
+        print("within: {:.0f} places per box, {:.2f} ms".format(
+            hits / len(boxes),
+            timed(lambda *box: storage.within(Place, *box), boxes)))
+        print("nearest 10: {:.2f} ms".format(timed(
+            lambda *point: storage.nearest(Place, *point), points)))
+        objs = list(storage.all(Place).values())
+
+        def scan(lat, lon):
+            return sorted(objs, key=lambda obj: haversine(
+                lat, lon, obj.latitude, obj.longitude))[:10]
+        print("nearest 10 by scan: {:.2f} ms".format(
+            timed(scan, points[:3])))
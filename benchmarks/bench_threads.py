@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""Stress FileStorage with reader threads running beside one writer.
+
+Usage: ./benchmarks/bench_threads.py [readers] [seconds] [count]
+
+Stores count objects (10k by default), then for `seconds` (2 by default)
+runs `readers` threads (8 by default) that list, show and count objects
+while one thread creates, updates and destroys objects and saves. It is
+run once without and once with the thread-safe mode, and prints the
+operations done and the errors raised by each side.
+"""
+import os
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def reader(storage, ids, done, stats):
+    """List, show and count objects until done is set."""
+    ops = errors = 0
+    i = 0
+    while not done.is_set():
+        try:
+            for obj in storage.all().values():
+                obj.id
+            storage.get(Place, ids[i % len(ids)])
+            storage.count(Place)
+            ops += 3
+        except RuntimeError:
+            errors += 1
+        i += 1
+    stats.append((ops, errors))
+
+
+def writer(storage, done, stats):
+    """Create, update, destroy and save objects until done is set."""
+    ops = errors = 0
+    while not done.is_set():
+        try:
+            place = Place()
+            place.name = "new"
+            storage.delete(place)
+            place = Place()
+            if ops % 20 == 0:
+                storage.save()
+            ops += 1
+        except RuntimeError:
+            errors += 1
+    stats.append((ops, errors))
+
+
+def run(threadsafe, readers, seconds, ids):
+    """Print the throughput and errors of one stress run."""
+    storage = FileStorage(threadsafe=threadsafe)
+    done = threading.Event()
+    read_stats, write_stats = [], []
+    threads = [threading.Thread(target=reader,
+                                args=(storage, ids, done, read_stats))
+               for _ in range(readers)]
+    threads.append(threading.Thread(target=writer,
+                                    args=(storage, done, write_stats)))
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    done.wait(seconds)
+    done.set()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start
+    print("threadsafe={!s:<5}  reads {:9.0f}/s  read errors {:6d}"
+          "  writes {:7.0f}/s  write errors {:6d}".format(
+              threadsafe, sum(s[0] for s in read_stats) / elapsed,
+              sum(s[1] for s in read_stats),
+              write_stats[0][0] / elapsed, write_stats[0][1]))
+
+
+if __name__ == "__main__":
+    readers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    count = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        ids = [Place().id for _ in range(count)]
+        for threadsafe in (False, True):
+            run(threadsafe, readers, seconds, ids)
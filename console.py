@@ -3,9 +3,10 @@
 
 import cmd
 import re
+from ast import literal_eval
 from shlex import split
 from models import storage
-from models.base_model import BaseModel
+from models.base_model import BaseModel, classes
 from models.user import User
 from models.state import State
 from models.city import City
@@ -40,15 +41,11 @@ class HBNBCommand(cmd.Cmd):
     """
 
     prompt = "(hbnb) "
-    __classes = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Place",
-        "Amenity",
-        "Review"
-    }
+
+    def precmd(self, line):
+        """Pick up the changes other processes saved before each command."""
+        storage.refresh()
+        return line
 
     def emptyline(self):
         """Do nothing upon receiving an empty line."""
@@ -91,10 +88,10 @@ class HBNBCommand(cmd.Cmd):
         argl = parse(arg)
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         else:
-            print(eval(argl[0])().id)
+            print(classes[argl[0]]().id)
             storage.save()
 
     def do_show(self, arg):
@@ -102,33 +99,31 @@ class HBNBCommand(cmd.Cmd):
         Display the string representation of a class instance of a given id.
         """
         argl = parse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict:
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            print(objdict["{}.{}".format(argl[0], argl[1])])
+            print(storage.get(argl[0], argl[1]))
 
     def do_destroy(self, arg):
         """Usage: destroy <class> <id> or <class>.destroy(<id>)
         Delete a class instance of a given id."""
         argl = parse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            del objdict["{}.{}".format(argl[0], argl[1])]
+            storage.delete(storage.get(argl[0], argl[1]))
             storage.save()
 
     def do_all(self, arg):
@@ -136,26 +131,23 @@ class HBNBCommand(cmd.Cmd):
         Display string representations of all instances of a given class.
         If no class is specified, displays all instantiated objects."""
         argl = parse(arg)
-        if len(argl) > 0 and argl[0] not in HBNBCommand.__classes:
+        if len(argl) > 0 and argl[0] not in classes:
             print("** class doesn't exist **")
+        elif len(argl) > 0:
+            print([obj.__str__() for obj in storage.all(argl[0]).values()])
         else:
-            objl = []
-            for obj in storage.all().values():
-                if len(argl) > 0 and argl[0] == obj.__class__.__name__:
-                    objl.append(obj.__str__())
-                elif len(argl) == 0:
-                    objl.append(obj.__str__())
-            print(objl)
+            print([obj.__str__() for obj in storage.all().values()])
 
     def do_count(self, arg):
         """Usage: count <class> or <class>.count()
         Retrieve the number of instances of a given class."""
         argl = parse(arg)
-        count = 0
-        for obj in storage.all().values():
-            if argl[0] == obj.__class__.__name__:
-                count += 1
-        print(count)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in classes:
+            print("** class doesn't exist **")
+        else:
+            print(storage.count(argl[0]))
 
     def do_update(self, arg):
         """Usage: update <class> <id> <attribute_name> <attribute_value> or
@@ -164,18 +156,18 @@ class HBNBCommand(cmd.Cmd):
         Update a class instance of a given id by adding or updating
         a given attribute key/value pair or dictionary."""
         argl = parse(arg)
-        objdict = storage.all()
 
         if len(argl) == 0:
             print("** class name missing **")
             return False
-        if argl[0] not in HBNBCommand.__classes:
+        if argl[0] not in classes:
             print("** class doesn't exist **")
             return False
         if len(argl) == 1:
             print("** instance id missing **")
             return False
-        if "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        obj = storage.get(argl[0], argl[1])
+        if obj is None:
             print("** no instance found **")
             return False
         if len(argl) == 2:
@@ -183,28 +175,27 @@ class HBNBCommand(cmd.Cmd):
             return False
         if len(argl) == 3:
             try:
-                type(eval(argl[2])) != dict
-            except NameError:
+                value = literal_eval(argl[2])
+            except (ValueError, SyntaxError):
                 print("** value missing **")
                 return False
 
         if len(argl) == 4:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            if argl[2] in obj.__class__.__dict__.keys():
-                valtype = type(obj.__class__.__dict__[argl[2]])
-                obj.__dict__[argl[2]] = valtype(argl[3])
-            else:
-                obj.__dict__[argl[2]] = argl[3]
-        elif type(eval(argl[2])) == dict:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            for k, v in eval(argl[2]).items():
-                if (k in obj.__class__.__dict__.keys() and
-                        type(obj.__class__.__dict__[k]) in {str, int, float}):
-                    valtype = type(obj.__class__.__dict__[k])
-                    obj.__dict__[k] = valtype(v)
-                else:
-                    obj.__dict__[k] = v
-        storage.save()
+            updates = {argl[2]: argl[3]}
+        elif len(argl) == 3 and type(value) == dict:
+            updates = value
+        else:
+            updates = {}
+        fields = type(obj).__fields__
+        try:
+            updates = {k: fields[k].coerce(v) if k in fields else v
+                       for k, v in updates.items()}
+        except (TypeError, ValueError):
+            print("** invalid value **")
+            return False
+        for k, v in updates.items():
+            setattr(obj, k, v)
+        obj.save()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,22 @@
 #!/usr/bin/python3
-"""Initialize FileStorage instance and reload data."""
+"""Initialize the storage engine and reload data.
 
-from models.engine.file_storage import FileStorage
-storage = FileStorage()
+HBNB_TYPE_STORAGE=db selects the SQLite engine (database file
+HBNB_DB_PATH, hbnb.db by default); any other value the JSON file engine.
+"""
+
+from os import getenv
+
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(path=getenv("HBNB_DB_PATH", "hbnb.db"))
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage(
+        journal=getenv("HBNB_STORAGE_JOURNAL") == "1",
+        durability=getenv("HBNB_STORAGE_DURABILITY", "batch"),
+        lazy=getenv("HBNB_STORAGE_LAZY") == "1",
+        group_window=float(getenv("HBNB_STORAGE_GROUP_WINDOW", "0")),
+        threadsafe=getenv("HBNB_STORAGE_THREADSAFE") == "1",
+        workers=int(getenv("HBNB_STORAGE_WORKERS", "0")))
 storage.reload()
@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Defines the Amenity class."""
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, Field
 
 
 class Amenity(BaseModel):
@@ -11,12 +11,4 @@ class Amenity(BaseModel):
         name (str): The name of the amenity.
     """
 
-    def __init__(self, *args, **kwargs):
-        """Initialize a new Amenity instance.
-
-        Args:
-            *args (any): Unused.
-            **kwargs (dict): Key/value pairs of attributes.
-        """
-        super().__init__(*args, **kwargs)
-        self.name = kwargs.get('name', '')
+    name = Field(str, text=True)
@@ -2,19 +2,192 @@
 """Defines the BaseModel class."""
 
 import models
+from os import getenv
 from uuid import uuid4
 from datetime import datetime
 
-class BaseModel:
-    """Represents the BaseModel of the HBnB project."""
+classes = {}
+"""dict: Every model class by name, filled in as the classes are defined."""
+
+COMPACT = getenv("HBNB_COMPACT_MODELS") == "1"
+"""bool: Whether model classes are compact unless created otherwise."""
+
+
+class Field:
+    """Represent a typed attribute of a model class.
+
+    A field is a data descriptor. Values set on an instance are coerced
+    to the field type and kept in the instance __dict__ under the field
+    name, or in a slot of a compact class, so to_dict and __str__ see
+    them. Every instance starts with each field set to its default;
+    reading a field that is not set, as on the class, returns the
+    default. An instance gets its own copy of a list default, which it
+    can change in place.
+
+    Attributes:
+        type (type): The type values are coerced to.
+        default: The value of the field while it is not set.
+        references (str): For an id field, the name of the class it
+            refers to; None otherwise.
+        text (bool): Whether the field holds prose to search by word.
+        name (str): The attribute name, set when the class is created.
+        slot (member_descriptor): In a compact class, the slot holding
+            the values; None otherwise.
+    """
+
+    def __init__(self, type, default=None, references=None, text=False):
+        """Initialize a new Field.
+
+        Args:
+            type (type): The type values are coerced to.
+            default: The default value; type() if None.
+            references (str): The class an id field refers to.
+            text (bool): Whether the field holds prose to search.
+        """
+        self.type = type
+        self.default = type() if default is None else default
+        self.references = references
+        self.text = text
+        self.name = None
+        self.slot = None
+        self.__copied = isinstance(self.default, list)
+
+    def initial(self):
+        """Return the default, as a new list if it is a list."""
+        return list(self.default) if self.__copied else self.default
+
+    def __set_name__(self, owner, name):
+        """Record the attribute name the field is assigned to."""
+        self.name = name
+
+    def __get__(self, obj, owner=None):
+        """Return the value of the field on obj, or its default."""
+        if obj is not None:
+            try:
+                if self.slot is not None:
+                    return self.slot.__get__(obj)
+                return obj.__dict__[self.name]
+            except (KeyError, AttributeError):
+                pass
+            if self.__copied:
+                value = self.initial()
+                self.__set__(obj, value)
+                return value
+        return self.default
+
+    def __set__(self, obj, value):
+        """Set the field on obj to value coerced to the field type."""
+        if self.slot is not None:
+            self.slot.__set__(obj, self.coerce(value))
+        else:
+            obj.__dict__[self.name] = self.coerce(value)
+
+    def coerce(self, value):
+        """Return value converted to the field type.
+
+        None is kept as is, and only str, int and float fields convert
+        values of other types.
+
+        Raises:
+            TypeError: If value cannot be converted.
+            ValueError: If value cannot be parsed as the field type.
+        """
+        if value is None or isinstance(value, self.type):
+            return value
+        if self.type not in (str, int, float):
+            raise TypeError("{} must be of type {}".format(
+                self.name, self.type.__name__))
+        return self.type(value)
+
+
+class ModelType(type):
+    """Represent the type of the model classes.
+
+    A compact model class keeps its id, its timestamps and its fields in
+    __slots__, which take less memory per instance than __dict__
+    entries. Its instances still have a __dict__, but it is only made
+    once attributes outside the schema are set, as the console update
+    may do; the _dynamic slot tells whether it was. Classes are compact
+    if created with the compact=True class
+    keyword, or by default if HBNB_COMPACT_MODELS=1; subclasses of a
+    compact class are compact too. BaseModel itself never is.
+    """
+
+    def __new__(mcs, name, bases, namespace, compact=None, **kwargs):
+        """Create a model class, with slots for its fields if compact."""
+        inherited = any(getattr(base, "__compact__", False)
+                        for base in bases)
+        if compact is None:
+            compact = inherited or (COMPACT and bool(bases))
+        fields = [key for key, value in namespace.items()
+                  if isinstance(value, Field)]
+        if compact:
+            slots = [] if inherited else ["id", "created_at", "updated_at",
+                                          "_dynamic"]
+            namespace["__slots__"] = tuple(
+                slots + ["_" + key for key in fields])
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+        cls.__compact__ = bool(compact)
+        cls.__slotted__ = {}
+        for klass in reversed(cls.__mro__):
+            cls.__slotted__.update(getattr(klass, "__slotted__", {}))
+        if compact:
+            if not inherited:
+                for key in ("id", "created_at", "updated_at"):
+                    cls.__slotted__[key] = vars(cls)[key]
+            for key in fields:
+                namespace[key].slot = vars(cls)["_" + key]
+                cls.__slotted__[key] = namespace[key].slot
+        return cls
+
+
+class BaseModel(metaclass=ModelType):
+    """Represents the BaseModel of the HBnB project.
+
+    Defining a subclass registers it in classes under its name, so the
+    storage engines and the console find every model class there.
+    Subclasses declare their attributes as Field class attributes.
+
+    Attributes:
+        __fields__ (dict): The Field of every declared attribute of the
+            class by name, inherited ones included.
+        __compact__ (bool): Whether the class is compact (see ModelType).
+        __slotted__ (dict): In a compact class, the slot of every
+            attribute kept in one, by attribute name.
+    """
+
+    __fields__ = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """Register the new subclass cls in classes and collect its
+        fields into __fields__.
+
+        Raises:
+            ValueError: If a model class of the same name is registered.
+        """
+        if cls.__name__ in classes:
+            raise ValueError("model class {} is already defined in {}".format(
+                cls.__name__, classes[cls.__name__].__module__))
+        super().__init_subclass__(**kwargs)
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, Field):
+                    fields[name] = value
+        cls.__fields__ = fields
+        classes[cls.__name__] = cls
 
     def __init__(self, *args, **kwargs):
         """Initialize a new BaseModel instance.
 
+        Every field starts at its default unless kwargs sets it.
+
         Args:
             *args (any): Unused.
             **kwargs (dict): Key/value pairs of attributes.
         """
+        for field in type(self).__fields__.values():
+            field.__set__(self, field.initial())
         self.id = str(uuid4())
         self.created_at = datetime.today()
         self.updated_at = datetime.today()
@@ -28,6 +201,87 @@ class BaseModel:
         else:
             models.storage.new(self)
 
+    @classmethod
+    def from_dict(cls, obj_dict):
+        """Return a new instance of cls with the attributes of obj_dict.
+
+        The fast path the storage engines load objects through. Unlike
+        cls(**obj_dict) it draws no id or timestamps only to overwrite
+        them, parses the timestamps with datetime.fromisoformat and
+        sets the state in one __setstate__ instead of one __setattr__
+        per attribute. Only the values of fields not already of their
+        field type are coerced, such as the numbers saved as strings by
+        older versions of the console; those that cannot be are kept as
+        they are, and the fields missing from obj_dict get their
+        default. The instance is not added to storage.
+
+        Args:
+            obj_dict (dict): The to_dict() form of the instance; its
+                '__class__' key, if any, is ignored.
+        """
+        obj = cls.__new__(cls)
+        state = dict(obj_dict)
+        state.pop("__class__", None)
+        for key in ("created_at", "updated_at"):
+            if isinstance(state.get(key), str):
+                state[key] = datetime.fromisoformat(state[key])
+        for name, field in cls.__fields__.items():
+            if name not in state:
+                state[name] = field.initial()
+                continue
+            value = state[name]
+            if value is not None and not isinstance(value, field.type):
+                try:
+                    state[name] = field.coerce(value)
+                except (TypeError, ValueError):
+                    pass
+        obj.__setstate__(state)
+        return obj
+
+    def __getstate__(self):
+        """Return a new dictionary of the attributes set on the instance."""
+        state = {}
+        for name, slot in type(self).__slotted__.items():
+            try:
+                state[name] = slot.__get__(self)
+            except AttributeError:
+                pass
+        if not type(self).__slotted__ or getattr(self, "_dynamic", False):
+            state.update(self.__dict__)
+        return state
+
+    def __setstate__(self, state):
+        """Replace the attributes of the instance with those of the
+        dictionary state, which the instance may keep as its __dict__."""
+        slotted = type(self).__slotted__
+        if not slotted:
+            object.__setattr__(self, "__dict__", state)
+            return
+        dynamic = {}
+        for name, slot in slotted.items():
+            if name in state:
+                slot.__set__(self, state[name])
+            elif hasattr(self, slot.__name__):
+                slot.__delete__(self)
+        for name, value in state.items():
+            if name not in slotted:
+                dynamic[name] = value
+        if dynamic or getattr(self, "_dynamic", False):
+            object.__setattr__(self, "__dict__", dynamic)
+            object.__setattr__(self, "_dynamic", bool(dynamic))
+
+    def __setattr__(self, name, value):
+        """Set the attribute, then flag the instance as changed in storage.
+
+        Storage is told before the change too, so a batch it runs can
+        record the state to roll back to.
+        """
+        models.storage.before_change(self)
+        super().__setattr__(name, value)
+        if self.__slotted__ and name not in self.__slotted__:
+            object.__setattr__(self, "_dynamic", True)
+        models.storage.mark_dirty(self)
+
     def save(self):
         """Update the updated_at attribute with the current datetime."""
         self.updated_at = datetime.today()
@@ -39,7 +293,7 @@ class BaseModel:
         Includes the key/value pair '__class__' representing
         the class name of the object.
         """
-        result_dict = self.__dict__.copy()
+        result_dict = self.__getstate__()
         result_dict['created_at'] = self.created_at.isoformat()
         result_dict['updated_at'] = self.updated_at.isoformat()
         result_dict['__class__'] = self.__class__.__name__
@@ -58,4 +312,8 @@ class BaseModel:
     def __str__(self):
         """Return the string representation of the BaseModel instance."""
         class_name = self.__class__.__name__
-        return "[{}] ({}) {}".format(class_name, self.id, self.__dict__)
+        return "[{}] ({}) {}".format(class_name, self.id,
+                                     self.__getstate__())
+
+
+classes[BaseModel.__name__] = BaseModel
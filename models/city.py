@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Defines the City class."""
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, Field
 
 
 class City(BaseModel):
@@ -12,13 +12,5 @@ class City(BaseModel):
         name (str): The name of the city.
     """
 
-    def __init__(self, *args, **kwargs):
-        """Initialize a new City instance.
-
-        Args:
-            *args (any): Unused.
-            **kwargs (dict): Key/value pairs of attributes.
-        """
-        super().__init__(*args, **kwargs)
-        self.state_id = kwargs.get('state_id', '')
-        self.name = kwargs.get('name', '')
+    state_id = Field(str, references="State")
+    name = Field(str, text=True)
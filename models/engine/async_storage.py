@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+"""Defines the AsyncStorage class."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncStorage:
+    """Represent an asyncio facade over a storage engine.
+
+    Saving and reloading encode or decode the objects and touch the
+    disk, so they run in an executor and the event loop keeps serving
+    other tasks meanwhile. Saves are serialized: a save requested while
+    another runs waits for it, and all the saves that waited together
+    are then done by one write. Lookups in memory run on the loop.
+
+    The engine should be a FileStorage in thread-safe mode (or a
+    DBStorage), as the executor thread reads it while the loop changes
+    objects.
+
+    Attributes:
+        storage: The wrapped storage engine.
+        batch_size (int): The number of objects aall yields between two
+            returns to the event loop.
+    """
+
+    def __init__(self, storage, executor=None, batch_size=1000):
+        """Initialize a new AsyncStorage.
+
+        Args:
+            storage: The storage engine to wrap.
+            executor (concurrent.futures.Executor): Where to run the
+                blocking calls; by default a single thread of its own.
+            batch_size (int): See the class attributes.
+        """
+        self.storage = storage
+        self.batch_size = batch_size
+        self.__executor = executor
+        self.__own_executor = executor is None
+        if executor is None:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="AsyncStorage")
+        self.__lock = None
+        self.__requested = 0
+        self.__saved = 0
+
+    async def __run(self, func, *args):
+        """Return the result of func(*args), run in the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, func, *args)
+
+    def __writer(self):
+        """Return the asyncio.Lock serializing saves and reloads."""
+        if self.__lock is None:
+            self.__lock = asyncio.Lock()
+        return self.__lock
+
+    async def asave(self):
+        """Save every change made before the call, off the loop."""
+        self.__requested += 1
+        ticket = self.__requested
+        async with self.__writer():
+            if self.__saved >= ticket:
+                return  # Written by a save that started after the call
+            covered = self.__requested
+            await self.__run(self.storage.save)
+            self.__saved = covered
+
+    async def areload(self):
+        """Reload the objects from disk, off the loop."""
+        async with self.__writer():
+            await self.__run(self.storage.reload)
+
+    async def aget(self, cls, id):
+        """Return the object of class cls (or class name) with id, or None."""
+        return self.storage.get(cls, id)
+
+    async def acount(self, cls=None):
+        """Return the number of stored objects of class cls, or of all."""
+        return self.storage.count(cls)
+
+    async def aall(self, cls=None):
+        """Yield the stored objects of class cls (or class name), or all.
+
+        The objects are listed in the executor, then yielded batch_size
+        at a time between returns to the event loop.
+        """
+        objs = await self.__run(lambda: list(self.storage.all(cls).values()))
+        for start in range(0, len(objs), self.batch_size):
+            for obj in objs[start:start + self.batch_size]:
+                yield obj
+            await asyncio.sleep(0)
+
+    def new(self, obj):
+        """Add obj to the storage; it is written by the next asave."""
+        self.storage.new(obj)
+
+    def delete(self, obj=None):
+        """Remove obj from the storage on the next asave."""
+        self.storage.delete(obj)
+
+    async def aclose(self):
+        """Wait for the running save, then shut down the own executor."""
+        async with self.__writer():
+            if self.__own_executor:
+                self.__executor.shutdown(wait=True)
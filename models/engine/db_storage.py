@@ -0,0 +1,405 @@
+#!/usr/bin/python3
+"""Defines the DBStorage class."""
+
+import heapq
+import json
+import sqlite3
+import threading
+from models.base_model import BaseModel, classes
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
+from models.engine.indexes import (TextIndex, foreign_keys, haversine,
+                                   list_fields, located, matches,
+                                   numeric_fields, sortable, split_lookup,
+                                   text_fields)
+from models.engine.query import Query
+
+OPERATORS = {"exact": "=", "lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+"""dict: The SQL operator of every lookup suffix."""
+
+
+class DBStorage:
+    """Represent a storage engine backed by an SQLite database.
+
+    Each model class has its own table holding the id, one indexed
+    column per foreign key of the class and the JSON form of the object.
+    Objects are only read from the database when asked for, and a save
+    writes just the objects created, changed or destroyed since the
+    last one, in a single transaction.
+
+    A save may run in another thread while objects are created, changed
+    and read: it takes the pending changes over at its start, so those
+    made meanwhile wait for the next save.
+
+    Attributes:
+        __path (str): The path of the database file.
+        __objects (dict): The objects read or created so far, so every
+            key maps to a single instance.
+        __pending (dict): The objects to write on the next save keyed
+            like __objects; destroyed ones map to None.
+        __saving (dict): The pending changes the running save took
+            over, still read until they are written; empty otherwise.
+        __lock (Lock): Held while __pending is changed or taken over.
+        __save_lock (Lock): Held by the running save.
+    """
+
+    def __init__(self, *, path="hbnb.db"):
+        """Initialize a new DBStorage.
+
+        Args:
+            path (str): The path of the database file.
+        """
+        self.__path = path
+        self.__db = None
+        self.__objects = {}
+        self.__pending = {}
+        self.__saving = {}
+        self.__lock = threading.Lock()
+        self.__save_lock = threading.Lock()
+
+    def reload(self):
+        """Open the database, creating the tables that do not exist."""
+        if self.__db is None:
+            self.__db = sqlite3.connect(self.__path, check_same_thread=False)
+        with self.__db:
+            for name in classes:
+                fks = foreign_keys(name)
+                columns = ["id TEXT PRIMARY KEY"]
+                columns.extend("{} TEXT".format(fk) for fk in fks)
+                columns.append("data TEXT NOT NULL")
+                self.__db.execute(
+                    'CREATE TABLE IF NOT EXISTS "{}" ({})'.format(
+                        name, ", ".join(columns)))
+                for fk in fks:
+                    self.__db.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" ({1})'
+                        .format(name, fk))
+
+    def close(self):
+        """Close the database; unsaved changes are lost."""
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+    def refresh(self):
+        """Forget the objects read so far, so the next reads see the
+        changes other processes saved; pending changes are kept."""
+        self.__objects = {key: obj for key, obj in self.__changes().items()
+                          if obj is not None}
+
+    def all(self, cls=None):
+        """Return a dictionary of all objects, or of class cls only.
+
+        Args:
+            cls (type or str): The class, or class name, to list.
+        """
+        names = classes if cls is None else [self.__name(cls)]
+        result = {}
+        for name in names:
+            rows = self.__db.execute(
+                'SELECT id, data FROM "{}"'.format(name))
+            result.update(self.__rows(name, rows))
+        self.__overlay(result, names)
+        return result
+
+    def get(self, cls, id):
+        """Return the object of class cls (or class name) with id, or None."""
+        name = self.__name(cls)
+        obj_key = "{}.{}".format(name, id)
+        for changes in (self.__pending, self.__saving):
+            try:
+                return changes[obj_key]
+            except KeyError:
+                pass
+        if obj_key in self.__objects:
+            return self.__objects[obj_key]
+        rows = self.__db.execute(
+            'SELECT id, data FROM "{}" WHERE id = ?'.format(name), (id,))
+        return self.__rows(name, rows).get(obj_key)
+
+    def count(self, cls=None):
+        """Return the number of objects, or of objects of class cls."""
+        if cls is None:
+            return sum(self.count(name) for name in classes)
+        name = self.__name(cls)
+        changes = {key.partition(".")[2]: obj
+                   for key, obj in self.__changes().items()
+                   if key.partition(".")[0] == name}
+        query = 'SELECT COUNT(*) FROM "{}" WHERE id NOT IN ({})'.format(
+            name, ", ".join("?" * len(changes)))
+        total = self.__db.execute(query, list(changes)).fetchone()[0]
+        return total + sum(1 for obj in changes.values() if obj is not None)
+
+    def find_by(self, cls, field, value):
+        """Return a dictionary of the objects of class cls (or class name)
+        whose attribute field equals value.
+
+        Foreign keys are looked up through their column index; other
+        fields are compared on every object of the class.
+        """
+        name = self.__name(cls)
+        if field not in foreign_keys(name):
+            return {key: obj for key, obj in self.all(name).items()
+                    if getattr(obj, field, None) == value}
+        rows = self.__db.execute('SELECT id, data FROM "{}" WHERE {} = ?'
+                                 .format(name, field), (value,))
+        result = self.__rows(name, rows)
+        self.__overlay(result, [name])
+        return {key: obj for key, obj in result.items()
+                if getattr(obj, field, None) == value}
+
+    def filter(self, cls, **lookups):
+        """Return a dictionary of the objects of class cls (or class name)
+        that match every lookup (see FileStorage.filter).
+
+        Lookups on the int and float fields of the schema, and contains
+        lookups on its list fields, are part of the query; the others
+        only test the rows it returns.
+        """
+        name = self.__name(cls)
+        fields, lists = numeric_fields(name), list_fields(name)
+        where, values = [], []
+        for lookup, value in lookups.items():
+            field, suffix = split_lookup(lookup)
+            if (field in fields and suffix in OPERATORS and
+                    value is not None):
+                where.append("json_extract(data, '$.{}') {} ?".format(
+                    field, OPERATORS[suffix]))
+                values.append(float(value))
+            elif field in lists and suffix == "contains" and value:
+                for item in set((value,) if isinstance(value, str)
+                                else value):
+                    where.append("EXISTS (SELECT 1 FROM json_each(data, "
+                                 "'$.{}') WHERE value = ?)".format(field))
+                    values.append(item)
+        query = 'SELECT id, data FROM "{}"'.format(name)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        result = self.__rows(name, self.__db.execute(query, values))
+        self.__overlay(result, [name])
+        return {key: obj for key, obj in result.items()
+                if matches(obj, lookups)}
+
+    def query(self, cls):
+        """Return a Query over the objects of class cls (or class name),
+        answered through find_by, filter or ordered."""
+        return Query(self, cls)
+
+    def within(self, cls, south, west, north, east):
+        """Return a dictionary of the objects of class cls (or class name)
+        located in a bounding box (see FileStorage.within).
+
+        Raises:
+            ValueError: If cls has no latitude and longitude fields.
+        """
+        name = self.__located(cls)
+        lon = "json_extract(data, '$.longitude')"
+        query = ('SELECT id, data FROM "{}" WHERE '
+                 "json_extract(data, '$.latitude') BETWEEN ? AND ? AND "
+                 "({} >= ? {} {} <= ?)").format(
+                     name, lon, "OR" if west > east else "AND", lon)
+        result = self.__rows(name, self.__db.execute(
+            query, (south, north, west, east)))
+        self.__overlay(result, [name])
+        return {key: obj for key, obj in result.items()
+                if obj.latitude is not None and obj.longitude is not None
+                and south <= obj.latitude <= north and
+                ((obj.longitude >= west or obj.longitude <= east)
+                 if west > east else west <= obj.longitude <= east)}
+
+    def nearest(self, cls, latitude, longitude, k=10, radius=None):
+        """Return a dictionary of the objects of class cls (or class name)
+        nearest to a point, nearest first (see FileStorage.nearest).
+
+        The database has no spatial index, so every object of the class
+        is measured.
+
+        Raises:
+            ValueError: If cls has no latitude and longitude fields.
+        """
+        found = []
+        for key, obj in self.all(self.__located(cls)).items():
+            if obj.latitude is None or obj.longitude is None:
+                continue
+            distance = haversine(latitude, longitude,
+                                 obj.latitude, obj.longitude)
+            if radius is None or distance <= radius:
+                found.append((distance, key, obj))
+        if k is None:
+            found.sort()
+        else:
+            found = heapq.nsmallest(k, found)
+        return {key: obj for _, key, obj in found}
+
+    def ordered(self, cls, field, low=None, high=None, *, reverse=False,
+                offset=0, limit=None):
+        """Return an iterator over the objects of class cls (or class
+        name) whose field is between low and high, by increasing value
+        (see FileStorage.ordered).
+
+        The bounds are part of the query, but the matching objects are
+        sorted in memory.
+
+        Raises:
+            ValueError: If field is not an int, float or str field.
+        """
+        name = self.__name(cls)
+        if field not in sortable(name):
+            raise ValueError("{} cannot be ordered by {}".format(name, field))
+        lookups = {}
+        if low is not None:
+            lookups[field + "__gte"] = low
+        if high is not None:
+            lookups[field + "__lte"] = high
+        objs = [obj for obj in self.filter(name, **lookups).values()
+                if getattr(obj, field, None) is not None]
+        objs.sort(key=lambda obj: (getattr(obj, field), obj.id),
+                  reverse=reverse)
+        stop = None if limit is None else offset + limit
+        return iter(objs[offset:stop])
+
+    def search(self, query, cls=None, k=10):
+        """Return a dictionary of the objects best matching the words of
+        query, best first (see FileStorage.search).
+
+        The database has no text index, so one is built over the
+        objects of every class searched on each call.
+
+        Raises:
+            ValueError: If cls has no text fields.
+        """
+        if cls is None:
+            names = [name for name in classes if text_fields(name)]
+        else:
+            names = [self.__name(cls)]
+            if not text_fields(names[0]):
+                raise ValueError("{} has no text fields".format(names[0]))
+        found, objs = [], {}
+        for name in names:
+            members = self.all(name)
+            index = TextIndex(text_fields(name))
+            index.update(members.items())
+            objs.update(members)
+            found.extend(index.search(query, k))
+        found.sort(reverse=True)
+        return {key: objs[key]
+                for _, key in (found[:k] if k is not None else found)}
+
+    def new(self, obj):
+        """Add obj to the objects written on the next save."""
+        obj_key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with self.__lock:
+            self.__objects[obj_key] = obj
+            self.__pending[obj_key] = obj
+
+    def before_change(self, obj):
+        """Do nothing: called by BaseModel before any attribute of obj is
+        set, for engines that roll changes back."""
+
+    def mark_dirty(self, obj):
+        """Flag obj as changed so the next save writes it.
+
+        Called by BaseModel after any attribute of obj is set; objects
+        that are not stored (yet) are ignored.
+        """
+        obj_key = "{}.{}".format(obj.__class__.__name__,
+                                 getattr(obj, "id", None))
+        if self.__objects.get(obj_key) is obj:
+            with self.__lock:
+                self.__pending[obj_key] = obj
+
+    def delete(self, obj=None):
+        """Remove obj from the database on the next save."""
+        if obj is None:
+            return
+        obj_key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        with self.__lock:
+            self.__objects.pop(obj_key, None)
+            self.__pending[obj_key] = None
+
+    def save(self):
+        """Write the pending objects to the database in one transaction.
+
+        The changes made while it runs are left for the next save; if it
+        fails, those it took over are pending again.
+        """
+        with self.__save_lock:
+            with self.__lock:
+                pending = self.__saving = self.__pending
+                self.__pending = {}
+            try:
+                self.__write(pending)
+            except BaseException:
+                with self.__lock:
+                    pending.update(self.__pending)
+                    self.__pending = pending
+                raise
+            finally:
+                self.__saving = {}
+
+    def __write(self, pending):
+        """Write the objects of pending, keyed like __pending, in one
+        transaction."""
+        with self.__db:
+            for obj_key, obj in pending.items():
+                name, _, id = obj_key.partition(".")
+                if obj is None:
+                    self.__db.execute(
+                        'DELETE FROM "{}" WHERE id = ?'.format(name), (id,))
+                    continue
+                fks = foreign_keys(name)
+                values = [id]
+                values.extend(getattr(obj, fk, None) for fk in fks)
+                values.append(json.dumps(obj.to_dict()))
+                self.__db.execute(
+                    'INSERT OR REPLACE INTO "{}" VALUES ({})'.format(
+                        name, ", ".join("?" * len(values))), values)
+
+    @staticmethod
+    def __name(cls):
+        """Return the class name of cls, a class or class name."""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __located(self, cls):
+        """Return the name of cls, which must have latitude and longitude.
+
+        Raises:
+            ValueError: If cls has no latitude and longitude fields.
+        """
+        name = self.__name(cls)
+        if not located(name):
+            raise ValueError("{} has no latitude and longitude".format(name))
+        return name
+
+    def __rows(self, name, rows):
+        """Return a dictionary of the objects of class name in rows."""
+        result = {}
+        for id, data in rows:
+            obj_key = "{}.{}".format(name, id)
+            obj = self.__objects.get(obj_key)
+            if obj is None:
+                obj = classes[name].from_dict(json.loads(data))
+                self.__objects[obj_key] = obj
+            result[obj_key] = obj
+        return result
+
+    def __changes(self):
+        """Return a new dictionary of the pending changes, those being
+        saved included."""
+        changes = dict(self.__saving)
+        changes.update(self.__pending)
+        return changes
+
+    def __overlay(self, result, names):
+        """Apply the pending changes of the classes in names to result."""
+        for obj_key, obj in self.__changes().items():
+            if obj_key.partition(".")[0] not in names:
+                continue
+            if obj is None:
+                result.pop(obj_key, None)
+            else:
+                result[obj_key] = obj
@@ -0,0 +1,810 @@
+#!/usr/bin/python3
+"""Defines the secondary indexes kept by the storage engines."""
+
+import heapq
+import math
+import operator
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from itertools import compress, repeat
+from models.base_model import classes
+try:
+    import numpy
+except ImportError:  # Columns are scanned with map() instead
+    numpy = None
+
+
+def contains(values, wanted):
+    """Return True if the list values holds every item of wanted, an
+    iterable of items or a single string."""
+    if isinstance(wanted, str):
+        wanted = (wanted,)
+    return set(wanted) <= set(values)
+
+
+LOOKUPS = {
+    "exact": operator.eq,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "contains": contains,
+}
+"""dict: The comparison of every lookup suffix (field__suffix=value)."""
+
+EARTH_RADIUS = 6371.0088
+"""float: The mean radius of the Earth in kilometers."""
+
+WORD = re.compile(r"\w+")
+
+
+def foreign_keys(cls_name):
+    """Return the names of the fields of class cls_name that hold the
+    id of another object, as declared by its schema."""
+    cls = classes.get(cls_name)
+    if cls is None:
+        return ()
+    return tuple(name for name, field in cls.__fields__.items()
+                 if field.references is not None)
+
+
+def numeric_fields(cls_name):
+    """Return the names of the int and float fields of class cls_name."""
+    cls = classes.get(cls_name)
+    if cls is None:
+        return ()
+    return tuple(name for name, field in cls.__fields__.items()
+                 if field.type in (int, float))
+
+
+def text_fields(cls_name):
+    """Return the names of the fields of class cls_name declared as text."""
+    cls = classes.get(cls_name)
+    if cls is None:
+        return ()
+    return tuple(name for name, field in cls.__fields__.items()
+                 if field.text)
+
+
+def tokenize(text):
+    """Return the list of the lowercase words of text."""
+    return WORD.findall(text.lower())
+
+
+def sortable(cls_name):
+    """Return the names of the int, float and str fields of class
+    cls_name, whose values can be ordered."""
+    cls = classes.get(cls_name)
+    if cls is None:
+        return ()
+    return tuple(name for name, field in cls.__fields__.items()
+                 if field.type in (int, float, str))
+
+
+def list_fields(cls_name):
+    """Return the names of the list fields of class cls_name."""
+    cls = classes.get(cls_name)
+    if cls is None:
+        return ()
+    return tuple(name for name, field in cls.__fields__.items()
+                 if field.type is list)
+
+
+def located(cls_name):
+    """Return True if class cls_name has latitude and longitude fields."""
+    cls = classes.get(cls_name)
+    return (cls is not None and "latitude" in cls.__fields__ and
+            "longitude" in cls.__fields__)
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance in kilometers between two points
+    given by their latitude and longitude in degrees."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2)
+         * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def split_lookup(lookup):
+    """Return the field and the LOOKUPS suffix of lookup, a keyword like
+    price_by_night__lte; a bare field name means exact.
+
+    Raises:
+        ValueError: If the suffix is not in LOOKUPS.
+    """
+    field, _, suffix = lookup.partition("__")
+    suffix = suffix or "exact"
+    if suffix not in LOOKUPS:
+        raise ValueError("unknown lookup: {}".format(lookup))
+    return field, suffix
+
+
+def matches(obj, lookups):
+    """Return True if obj matches every lookup of the dictionary lookups.
+
+    Values that do not compare, such as None with a number, never match.
+    """
+    for lookup, value in lookups.items():
+        field, suffix = split_lookup(lookup)
+        try:
+            if not LOOKUPS[suffix](getattr(obj, field, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+class Index:
+    """Represent a secondary index of the objects of a model class.
+
+    Subclasses define add, to index an object at its key or reindex
+    it, and discard, to remove a key.
+    """
+
+    def update(self, items):
+        """Index every object of items, (key, object) pairs."""
+        for key, obj in items:
+            self.add(key, obj)
+
+
+class FieldIndex(Index):
+    """Represent a reverse index on one attribute of a model class.
+
+    Attributes:
+        field (str): The name of the indexed attribute.
+    """
+
+    def __init__(self, field):
+        """Initialize a new, empty FieldIndex on field."""
+        self.field = field
+        self.__keys = {}
+        self.__values = {}
+
+    def add(self, key, obj):
+        """Index obj, stored at key, under its current value of field."""
+        value = getattr(obj, self.field, None)
+        try:
+            self.__keys.setdefault(value, set()).add(key)
+        except TypeError:
+            return  # Unhashable values are not indexed
+        self.__values[key] = value
+
+    def discard(self, key):
+        """Remove key from the index, if it is there."""
+        if key not in self.__values:
+            return
+        value = self.__values.pop(key)
+        keys = self.__keys[value]
+        keys.discard(key)
+        if not keys:
+            del self.__keys[value]
+
+    def lookup(self, value):
+        """Return the set of keys whose object has field equal to value."""
+        try:
+            return self.__keys.get(value, set())
+        except TypeError:
+            return set()
+
+
+class SortedIndex(Index):
+    """Represent an ordered index on one attribute of a model class.
+
+    The values are kept sorted in a list, with the keys in a parallel
+    list ordered by key among equal values, so a range is found by
+    bisection and a page of it read without touching the rest. Objects
+    whose value is None are not indexed.
+
+    Attributes:
+        field (str): The name of the indexed attribute.
+    """
+
+    def __init__(self, field):
+        """Initialize a new, empty SortedIndex on field."""
+        self.field = field
+        self.__sorted = []
+        self.__keys = []
+        self.__values = {}
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__keys)
+
+    def __find(self, value, key):
+        """Return the position of key, whose value is value, or of where
+        it belongs."""
+        low = bisect_left(self.__sorted, value)
+        high = bisect_right(self.__sorted, value, low)
+        return bisect_left(self.__keys, key, low, high)
+
+    def add(self, key, obj):
+        """Index obj, stored at key, under its current value of field."""
+        self.discard(key)
+        value = getattr(obj, self.field, None)
+        if value is None:
+            return
+        i = self.__find(value, key)
+        self.__sorted.insert(i, value)
+        self.__keys.insert(i, key)
+        self.__values[key] = value
+
+    def update(self, items):
+        """Index every object of items, (key, object) pairs, sorting
+        them all at once if the index is empty."""
+        if self.__keys:
+            super().update(items)
+            return
+        entries = []
+        for key, obj in items:
+            value = getattr(obj, self.field, None)
+            if value is not None:
+                entries.append((value, key))
+        entries.sort()
+        self.__sorted = [value for value, _ in entries]
+        self.__keys = [key for _, key in entries]
+        self.__values = dict(zip(self.__keys, self.__sorted))
+
+    def discard(self, key):
+        """Remove key from the index, if it is there."""
+        if key not in self.__values:
+            return
+        i = self.__find(self.__values.pop(key), key)
+        del self.__sorted[i]
+        del self.__keys[i]
+
+    def slice(self, low=None, high=None, low_open=False, high_open=False,
+              reverse=False, offset=0, limit=None):
+        """Return the list of keys whose value is between low and high,
+        in the order of the values, skipping offset and keeping at most
+        limit of them; only those are read.
+
+        Args:
+            low: The lowest value; None for no bound.
+            high: The highest value; None for no bound.
+            low_open (bool): Leave out the values equal to low.
+            high_open (bool): Leave out the values equal to high.
+            reverse (bool): Start from the highest value.
+            offset (int): The number of keys to skip.
+            limit (int): The most keys to return; None for no limit.
+        """
+        start, stop = 0, len(self.__sorted)
+        if low is not None:
+            start = (bisect_right if low_open else bisect_left)(
+                self.__sorted, low)
+        if high is not None:
+            stop = (bisect_left if high_open else bisect_right)(
+                self.__sorted, high, start)
+        count = max(stop - start - offset, 0)
+        if limit is not None:
+            count = min(count, limit)
+        if not reverse:
+            return self.__keys[start + offset:start + offset + count]
+        return self.__keys[stop - offset - count:stop - offset][::-1]
+
+
+class ColumnStore(Index):
+    """Represent numeric fields of the objects of a class as columns.
+
+    Every field is an array of doubles holding one row per object, NaN
+    standing for None, so a filter is a pass over contiguous memory: a
+    NumPy vector operation if NumPy is installed, otherwise a map() of
+    the operator functions, which also loops in C, over the rows that
+    passed the lookups before. Removing an object
+    moves the last row into its place, so rows are in no given order.
+
+    Attributes:
+        fields (tuple): The names of the stored fields.
+    """
+
+    def __init__(self, fields):
+        """Initialize a new, empty ColumnStore of the given fields."""
+        self.fields = tuple(fields)
+        self.__columns = {field: array("d") for field in self.fields}
+        self.__keys = []
+        self.__rows = {}
+
+    def __len__(self):
+        """Return the number of rows."""
+        return len(self.__keys)
+
+    def add(self, key, obj):
+        """Store the fields of obj, stored at key, in its row."""
+        row = self.__rows.get(key)
+        if row is None:
+            self.__rows[key] = len(self.__keys)
+            self.__keys.append(key)
+        for field, column in self.__columns.items():
+            value = getattr(obj, field, None)
+            value = float("nan") if value is None else float(value)
+            if row is None:
+                column.append(value)
+            else:
+                column[row] = value
+
+    def discard(self, key):
+        """Remove the row of key, if there is one."""
+        row = self.__rows.pop(key, None)
+        if row is None:
+            return
+        last_key = self.__keys.pop()
+        for column in self.__columns.values():
+            value = column.pop()
+            if last_key != key:
+                column[row] = value
+        if last_key != key:
+            self.__keys[row] = last_key
+            self.__rows[last_key] = row
+
+    def select(self, lookups):
+        """Return the list of keys whose row matches every lookup.
+
+        Args:
+            lookups (dict): Values by lookup (see split_lookup) on the
+                stored fields.
+
+        Raises:
+            ValueError: If a value is not a number.
+        """
+        if not self.__keys:
+            return []
+        rows = None
+        for lookup, value in lookups.items():
+            field, suffix = split_lookup(lookup)
+            test = LOOKUPS[suffix]
+            column = self.__columns[field]
+            if numpy is not None:
+                passed = test(numpy.frombuffer(column, dtype=numpy.float64),
+                              float(value))
+                rows = passed if rows is None else rows & passed
+            elif rows is None:
+                rows = list(compress(range(len(column)),
+                                     map(test, column, repeat(float(value)))))
+            else:
+                # Only test the rows that passed the lookups before
+                rows = list(compress(rows, map(
+                    test, map(column.__getitem__, rows),
+                    repeat(float(value)))))
+        if numpy is not None:
+            rows = numpy.flatnonzero(rows).tolist()
+        return list(map(self.__keys.__getitem__, rows))
+
+
+class GridIndex(Index):
+    """Represent a spatial index on the latitude and longitude fields.
+
+    The globe is cut into cells of cell_size degrees on a side, and each
+    cell holds the keys of the objects located in it. A bounding box
+    only looks at the cells it overlaps. A nearest query visits rings
+    of cells around the point, nearest first, and stops once no point
+    of the next ring can be closer than the k found so far; once a ring
+    holds more cells than are occupied, it goes on with the occupied
+    cells left, nearest first. Objects lacking either coordinate are
+    not indexed.
+
+    Attributes:
+        cell_size (float): The side of a cell in degrees.
+    """
+
+    def __init__(self, cell_size=0.1):
+        """Initialize a new, empty GridIndex of cell_size degree cells."""
+        self.cell_size = cell_size
+        self.__rows = math.ceil(180 / cell_size)
+        self.__cols = math.ceil(360 / cell_size)
+        self.__cells = {}
+        self.__points = {}
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__points)
+
+    def __cell(self, lat, lon):
+        """Return the (row, column) of the cell holding lat, lon."""
+        row = min(int((lat + 90) // self.cell_size), self.__rows - 1)
+        return max(row, 0), int((lon + 180) // self.cell_size) % self.__cols
+
+    def add(self, key, obj):
+        """Index obj, stored at key, at its latitude and longitude."""
+        self.discard(key)
+        lat = getattr(obj, "latitude", None)
+        lon = getattr(obj, "longitude", None)
+        if lat is None or lon is None:
+            return
+        self.__points[key] = (lat, lon)
+        self.__cells.setdefault(self.__cell(lat, lon), set()).add(key)
+
+    def discard(self, key):
+        """Remove key from the index, if it is there."""
+        point = self.__points.pop(key, None)
+        if point is None:
+            return
+        cell = self.__cell(*point)
+        keys = self.__cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self.__cells[cell]
+
+    def within(self, south, west, north, east):
+        """Return the list of keys located in a bounding box.
+
+        Args:
+            south (float): The lowest latitude of the box.
+            west (float): The western longitude; greater than east for a
+                box crossing the 180th meridian.
+            north (float): The highest latitude of the box.
+            east (float): The eastern longitude.
+        """
+        if south > north:
+            return []
+        crosses = west > east
+
+        def inside(lat, lon):
+            if not south <= lat <= north:
+                return False
+            if crosses:
+                return lon >= west or lon <= east
+            return west <= lon <= east
+
+        first, west_col = self.__cell(south, west)
+        last, east_col = self.__cell(north, east)
+        cols = (east_col - west_col) % self.__cols + 1
+        if crosses and cols == 1 or east - west >= 360:
+            cols = self.__cols
+        if (last - first + 1) * cols > len(self.__cells):
+            cells = self.__cells.values()
+        else:
+            cells = [self.__cells.get((row, (west_col + col) % self.__cols))
+                     for row in range(first, last + 1)
+                     for col in range(cols)]
+        points = self.__points
+        return [key for keys in cells if keys for key in keys
+                if inside(*points[key])]
+
+    def nearest(self, lat, lon, k=None, radius=None):
+        """Return the list of (distance, key) of the objects nearest to
+        lat, lon, nearest first, distances being in kilometers.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            k (int): The most objects to return; None for no limit.
+            radius (float): The greatest distance in kilometers; None
+                for no limit. Either k or radius should be given.
+        """
+        if k is not None and k <= 0:
+            return []
+        limit = math.inf if radius is None else radius
+        best = []  # Max-heap of the k nearest as (-distance, key)
+        row0, col0 = self.__cell(lat, lon)
+        points = self.__points
+
+        def consider(keys):
+            for key in keys:
+                distance = haversine(lat, lon, *points[key])
+                if distance > limit:
+                    continue
+                if k is None or len(best) < k:
+                    heapq.heappush(best, (-distance, key))
+                elif distance < -best[0][0]:
+                    heapq.heapreplace(best, (-distance, key))
+
+        def done(bound):
+            return bound > limit or (k is not None and len(best) == k and
+                                     bound > -best[0][0])
+
+        for ring in range(max(self.__rows, self.__cols)):
+            if done(self.__ring_bound(lat, ring)):
+                break
+            if (2 * ring + 1) ** 2 > len(self.__cells):
+                left = sorted(
+                    (self.__cell_bound(lat, lon, cell), cell)
+                    for cell in self.__cells
+                    if self.__distance(cell, row0, col0) >= ring)
+                for bound, cell in left:
+                    if done(bound):
+                        break
+                    consider(self.__cells[cell])
+                break
+            for row, col in self.__ring(row0, col0, ring):
+                consider(self.__cells.get((row, col), ()))
+        return sorted((-distance, key) for distance, key in best)
+
+    def __distance(self, cell, row0, col0):
+        """Return how many rings of cells away from row0, col0 cell is."""
+        across = (cell[1] - col0) % self.__cols
+        return max(abs(cell[0] - row0), min(across, self.__cols - across))
+
+    def __ring(self, row0, col0, ring):
+        """Yield the cells ring cells away from row0, col0, counting
+        columns around the globe both ways."""
+        edges = [(row, col) for col in range(-ring, ring + 1)
+                 for row in {-ring, ring}]
+        edges.extend((row, col) for row in range(1 - ring, ring)
+                     for col in {-ring, ring})
+        wraps = 2 * ring + 1 > self.__cols
+        seen = set()
+        for row, col in edges:
+            cell = (row0 + row, (col0 + col) % self.__cols)
+            if not 0 <= cell[0] < self.__rows:
+                continue
+            if wraps:
+                # Columns met twice around the globe are nearer than ring
+                if (cell in seen or
+                        self.__distance(cell, row0, col0) != ring):
+                    continue
+                seen.add(cell)
+            yield cell
+
+    def __ring_bound(self, lat, ring):
+        """Return a lower bound in kilometers of the distance from a
+        point at lat to any point in the given ring of cells around it
+        or beyond."""
+        if ring == 0:
+            return 0.0
+        degrees = math.radians((ring - 1) * self.cell_size)
+        return EARTH_RADIUS * min(degrees, self.__across(lat, degrees))
+
+    def __cell_bound(self, lat, lon, cell):
+        """Return a lower bound in kilometers of the distance from lat,
+        lon to any point of cell: the distance to its center, less the
+        distance of any of its points to the center."""
+        center = haversine(lat, lon,
+                           (cell[0] + 0.5) * self.cell_size - 90,
+                           (cell[1] + 0.5) * self.cell_size - 180)
+        return max(center - EARTH_RADIUS * math.radians(self.cell_size), 0.0)
+
+    @staticmethod
+    def __across(lat, radians):
+        """Return the angle from a point at lat to the meridians at least
+        radians of longitude away from it."""
+        return math.asin(math.cos(math.radians(lat)) *
+                         math.sin(min(radians, math.pi / 2)))
+
+
+class TextIndex(Index):
+    """Represent a full-text inverted index ranking objects with BM25.
+
+    The text of an object is that of its text fields, split into words
+    by tokenize. Every word maps to its postings, the number of times it
+    occurs in each object holding it, so a query only reads the postings
+    of its own words. The words of each object, needed to reindex or
+    remove it, are derived from the postings on the first such change
+    after from_dict. After to_dict, the dictionaries it shares are
+    copied before they change, one word at a time.
+
+    Attributes:
+        fields (tuple): The names of the indexed fields.
+        k1 (float): How fast repeating a word stops raising the score.
+        b (float): How much long texts are penalized, from 0 to 1.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, fields):
+        """Initialize a new, empty TextIndex of the given fields."""
+        self.fields = tuple(fields)
+        self.__postings = {}
+        self.__lengths = {}
+        self.__total = 0
+        self.__words = {}
+        self.__shared = False
+        self.__owned = None
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__lengths)
+
+    def keys(self):
+        """Return a view of the keys of the indexed objects."""
+        return self.__lengths.keys()
+
+    def add(self, key, obj):
+        """Index the text fields of obj, stored at key."""
+        self.discard(key)
+        words = []
+        for field in self.fields:
+            value = getattr(obj, field, None)
+            if isinstance(value, str):
+                words.extend(tokenize(value))
+        counts = Counter(words)
+        for word, count in counts.items():
+            self.__postings_of(word)[key] = count
+        self.__own()[key] = len(words)
+        self.__total += len(words)
+        if self.__words is not None:
+            self.__words[key] = tuple(counts)
+
+    def discard(self, key):
+        """Remove key from the index, if it is there."""
+        if key not in self.__lengths:
+            return
+        length = self.__own().pop(key)
+        if self.__words is None:
+            self.__words = {}
+            for word, postings in self.__postings.items():
+                for other in postings:
+                    self.__words.setdefault(other, []).append(word)
+        for word in self.__words.pop(key, ()):
+            postings = self.__postings_of(word)
+            del postings[key]
+            if not postings:
+                del self.__postings[word]
+        self.__total -= length
+
+    def __own(self):
+        """Stop sharing the postings and lengths dictionaries with a
+        to_dict() result, if they are, and return the lengths."""
+        if self.__shared:
+            self.__postings = dict(self.__postings)
+            self.__lengths = dict(self.__lengths)
+            self.__shared = False
+            self.__owned = set()
+        return self.__lengths
+
+    def __postings_of(self, word):
+        """Return the postings of word to change, copied first if they
+        are shared with a to_dict() result."""
+        self.__own()
+        postings = self.__postings.get(word)
+        if postings is None:
+            postings = self.__postings[word] = {}
+        elif self.__owned is not None and word not in self.__owned:
+            postings = self.__postings[word] = dict(postings)
+        if self.__owned is not None:
+            self.__owned.add(word)
+        return postings
+
+    def search(self, query, k=10):
+        """Return the list of (score, key) of the k objects ranking best
+        for the words of query by BM25, best first; k None for all."""
+        count = len(self.__lengths)
+        if not count:
+            return []
+        average = self.__total / count or 1.0
+        lengths = self.__lengths
+        k1, b = self.k1, self.b
+        scores = {}
+        for word in set(tokenize(query)):
+            postings = self.__postings.get(word)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) /
+                           (len(postings) + 0.5))
+            for key, times in postings.items():
+                norm = k1 * (1 - b + b * lengths[key] / average)
+                scores[key] = (scores.get(key, 0.0) +
+                               idf * times * (k1 + 1) / (times + norm))
+        ranked = ((score, key) for key, score in scores.items())
+        if k is None:
+            return sorted(ranked, reverse=True)
+        return heapq.nlargest(k, ranked)
+
+    def to_dict(self):
+        """Return a dictionary of the contents of the index, to encode
+        as JSON. It shares the dictionaries of the index, which copies
+        them before changing them, so it can be encoded at any time."""
+        self.__shared = True
+        return {"fields": list(self.fields), "postings": self.__postings,
+                "lengths": self.__lengths}
+
+    @classmethod
+    def from_dict(cls, index_dict):
+        """Return a new TextIndex holding the contents index_dict, the
+        to_dict() form of an index, which it shares like to_dict."""
+        index = cls(index_dict["fields"])
+        index.__postings = index_dict["postings"]
+        index.__lengths = index_dict["lengths"]
+        index.__total = sum(index.__lengths.values())
+        index.__words = None
+        index.__shared = True
+        return index
+
+
+class BitmapIndex(Index):
+    """Represent an index of the items of one list attribute of a model
+    class, such as the amenity ids of places.
+
+    Every indexed key gets a small integer id, those of removed keys
+    being given again, and every item maps to a bitmap: an int whose
+    bit i is set when the key of id i holds the item. The keys holding
+    several items are then found by and-ing their bitmaps.
+
+    Attributes:
+        field (str): The name of the indexed attribute.
+    """
+
+    def __init__(self, field):
+        """Initialize a new, empty BitmapIndex on field."""
+        self.field = field
+        self.__bitmaps = {}
+        self.__ids = {}
+        self.__keys = []
+        self.__free = []
+        self.__items = {}
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__ids)
+
+    def __items_of(self, obj):
+        """Return the set of the items of obj, empty unless a list of
+        hashable items."""
+        values = getattr(obj, self.field, None)
+        if not isinstance(values, list):
+            return set()
+        try:
+            return set(values)
+        except TypeError:
+            return set()
+
+    def add(self, key, obj):
+        """Index the items of the field of obj, stored at key."""
+        self.discard(key)
+        if self.__free:
+            id = self.__free.pop()
+            self.__keys[id] = key
+        else:
+            id = len(self.__keys)
+            self.__keys.append(key)
+        self.__ids[key] = id
+        self.__items[key] = items = self.__items_of(obj)
+        bit = 1 << id
+        for item in items:
+            self.__bitmaps[item] = self.__bitmaps.get(item, 0) | bit
+
+    def update(self, items):
+        """Index every object of items, (key, object) pairs, building
+        each bitmap at once if the index is empty."""
+        if self.__ids:
+            super().update(items)
+            return
+        holders = {}
+        for key, obj in items:
+            id = len(self.__keys)
+            self.__keys.append(key)
+            self.__ids[key] = id
+            self.__items[key] = self.__items_of(obj)
+            for item in self.__items[key]:
+                holders.setdefault(item, []).append(id)
+        size = (len(self.__keys) + 7) // 8
+        for item, ids in holders.items():
+            bits = bytearray(size)
+            for id in ids:
+                bits[id >> 3] |= 1 << (id & 7)
+            self.__bitmaps[item] = int.from_bytes(bits, "little")
+
+    def discard(self, key):
+        """Remove key from the index, if it is there."""
+        id = self.__ids.pop(key, None)
+        if id is None:
+            return
+        bit = 1 << id
+        for item in self.__items.pop(key):
+            bitmap = self.__bitmaps[item] ^ bit
+            if bitmap:
+                self.__bitmaps[item] = bitmap
+            else:
+                del self.__bitmaps[item]
+        self.__keys[id] = None
+        self.__free.append(id)
+
+    def bitmap(self, wanted):
+        """Return the bitmap of the keys holding every item of wanted,
+        a non-empty iterable of items or a single string."""
+        if isinstance(wanted, str):
+            wanted = (wanted,)
+        result = None
+        for item in set(wanted):
+            bitmap = self.__bitmaps.get(item, 0)
+            result = bitmap if result is None else result & bitmap
+            if not result:
+                return 0
+        return result
+
+    def decode(self, bitmap):
+        """Return the list of the keys whose bit is set in bitmap."""
+        keys = self.__keys
+        bits = bin(bitmap)[:1:-1]  # Lowest bit first
+        return [keys[found.start()] for found in re.finditer("1", bits)]
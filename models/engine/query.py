@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+"""Defines the Query class."""
+
+import copy
+from itertools import islice
+from models.engine.indexes import (foreign_keys, list_fields, matches,
+                                   numeric_fields, sortable, split_lookup)
+
+
+class Query:
+    """Represent a query over the objects of a model class, built by
+    chaining where, order_by, offset and limit on storage.query(cls).
+
+    Each call returns a new Query and nothing is read until the query is
+    iterated. It is then answered through the methods of the storage
+    engine, picking the first plan that applies:
+
+    - find_by, when a foreign key must equal a value;
+    - ordered, when ordering by an int, float or str field, with the
+      bounds given on that field;
+    - filter, which answers the lookups it can from the indexes of the
+      engine and scans the class otherwise.
+
+    The lookups the plan does not answer are tested on the objects it
+    returns; explain describes the plan. Ordering leaves out the objects
+    whose field is None, like storage.ordered, and orders equal values
+    by id.
+    """
+
+    def __init__(self, storage, cls):
+        """Initialize a new Query over every object of class cls.
+
+        Args:
+            storage: The FileStorage or DBStorage to read.
+            cls (type or str): The class, or class name, to query.
+        """
+        self.__storage = storage
+        self.__cls = cls if isinstance(cls, str) else cls.__name__
+        self.__lookups = {}
+        self.__order = None
+        self.__reverse = False
+        self.__offset = 0
+        self.__limit = None
+
+    def __copy(self):
+        """Return a copy of the query, to change."""
+        query = copy.copy(self)
+        query.__lookups = dict(self.__lookups)
+        return query
+
+    def where(self, **lookups):
+        """Return the query keeping only the objects matching every
+        lookup (see FileStorage.filter).
+
+        Raises:
+            ValueError: If a lookup is unknown.
+        """
+        for lookup in lookups:
+            split_lookup(lookup)
+        query = self.__copy()
+        query.__lookups.update(lookups)
+        return query
+
+    def order_by(self, field):
+        """Return the query ordered by field, or by decreasing field if
+        it starts with "-"."""
+        query = self.__copy()
+        query.__reverse = field.startswith("-")
+        query.__order = field.lstrip("-")
+        return query
+
+    def offset(self, offset):
+        """Return the query skipping its first offset objects.
+
+        Raises:
+            ValueError: If offset is negative.
+        """
+        if offset < 0:
+            raise ValueError("offset must not be negative")
+        query = self.__copy()
+        query.__offset = offset
+        return query
+
+    def limit(self, limit):
+        """Return the query returning at most limit objects; None for no
+        limit.
+
+        Raises:
+            ValueError: If limit is negative.
+        """
+        if limit is not None and limit < 0:
+            raise ValueError("limit must not be negative")
+        query = self.__copy()
+        query.__limit = limit
+        return query
+
+    def __iter__(self):
+        """Return an iterator over the objects of the query."""
+        return self.__plan()[0]
+
+    def first(self):
+        """Return the first object of the query, or None."""
+        return next(iter(self.limit(1)), None)
+
+    def count(self):
+        """Return the number of objects of the query."""
+        return sum(1 for _ in self)
+
+    def explain(self):
+        """Return a description of the plan answering the query, one
+        step per line."""
+        return "\n".join(self.__plan()[1])
+
+    def __plan(self):
+        """Return an iterator over the objects of the query, reading
+        nothing before its first item, and the list of the steps of the
+        plan it follows."""
+        name, lookups = self.__cls, self.__lookups
+        stop = None if self.__limit is None else self.__offset + self.__limit
+        steps = ["query {}".format(name)]
+        key = self.__foreign_key()
+        if key is not None:
+            rest = {lookup: value for lookup, value in lookups.items()
+                    if lookup != key}
+            steps.append("find_by {}={!r}".format(
+                split_lookup(key)[0], lookups[key]))
+            source = self.__fetch(self.__storage.find_by, name,
+                                  split_lookup(key)[0], lookups[key])
+        elif self.__order in sortable(name):
+            return self.__ordered(steps)
+        else:
+            rest = {}
+            pushed = self.__pushed()
+            tested = {lookup: value for lookup, value in lookups.items()
+                      if lookup not in pushed}
+            steps.append("filter " + self.__describe(
+                {lookup: lookups[lookup] for lookup in pushed})
+                if pushed else "scan")
+            if tested:
+                steps.append("test " + self.__describe(tested))
+            source = self.__fetch(self.__storage.filter, name, **lookups)
+        if rest:
+            steps.append("test " + self.__describe(rest))
+        if self.__order is not None:
+            steps.append("sort by {}{} in memory".format(
+                "-" if self.__reverse else "", self.__order))
+        if self.__offset or stop is not None:
+            steps.append("slice [{}:{}]".format(
+                self.__offset, "" if stop is None else stop))
+        objs = (obj for obj in source if not rest or matches(obj, rest))
+        if self.__order is not None:
+            objs = self.__sorted(objs)
+        return islice(objs, self.__offset, stop), steps
+
+    def __ordered(self, steps):
+        """Return __plan reading the objects from storage.ordered."""
+        name, field = self.__cls, self.__order
+        low, high, rest = None, None, {}
+        for lookup, value in self.__lookups.items():
+            lookup_field, suffix = split_lookup(lookup)
+            if (lookup_field != field or value is None or
+                    suffix == "contains"):
+                rest[lookup] = value
+                continue
+            if field in numeric_fields(name):
+                value = float(value)
+            if suffix in ("gt", "lt"):
+                rest[lookup] = value
+            if suffix in ("exact", "gte", "gt"):
+                low = value if low is None else max(low, value)
+            if suffix in ("exact", "lte", "lt"):
+                high = value if high is None else min(high, value)
+        steps.append("ordered {}{} from {!r} to {!r}".format(
+            "-" if self.__reverse else "", field, low, high))
+        offset, limit = self.__offset, self.__limit
+        if not rest:
+            if offset or limit is not None:
+                steps.append("slice [{}:{}] in the index".format(
+                    offset, "" if limit is None else offset + limit))
+            return self.__fetch(self.__storage.ordered, name, field, low,
+                                high, reverse=self.__reverse, offset=offset,
+                                limit=limit), steps
+        steps.append("test " + self.__describe(rest))
+        stop = None if limit is None else offset + limit
+        if offset or stop is not None:
+            steps.append("slice [{}:{}]".format(
+                offset, "" if stop is None else stop))
+        objs = (obj for obj in self.__fetch(
+            self.__storage.ordered, name, field, low, high,
+            reverse=self.__reverse) if matches(obj, rest))
+        return islice(objs, offset, stop), steps
+
+    def __foreign_key(self):
+        """Return the first lookup of a foreign key equal to a value, or
+        None."""
+        keys = foreign_keys(self.__cls)
+        for lookup in self.__lookups:
+            field, suffix = split_lookup(lookup)
+            if field in keys and suffix == "exact":
+                return lookup
+        return None
+
+    def __pushed(self):
+        """Return the lookups filter answers from the indexes."""
+        numbers, lists = numeric_fields(self.__cls), list_fields(self.__cls)
+        pushed = []
+        for lookup, value in self.__lookups.items():
+            field, suffix = split_lookup(lookup)
+            if (field in numbers and suffix != "contains" and
+                    value is not None or
+                    field in lists and suffix == "contains" and value):
+                pushed.append(lookup)
+        return pushed
+
+    def __sorted(self, objs):
+        """Return objs ordered by the order of the query, leaving out
+        those whose field is None."""
+        field = self.__order
+        objs = [obj for obj in objs if getattr(obj, field, None) is not None]
+        objs.sort(key=lambda obj: (getattr(obj, field), obj.id),
+                  reverse=self.__reverse)
+        return objs
+
+    @staticmethod
+    def __fetch(method, *args, **kwargs):
+        """Yield the objects returned by method(*args, **kwargs), called
+        on the first item."""
+        result = method(*args, **kwargs)
+        yield from result.values() if isinstance(result, dict) else result
+
+    @staticmethod
+    def __describe(lookups):
+        """Return lookups as a list of keyword arguments."""
+        return ", ".join("{}={!r}".format(lookup, value)
+                         for lookup, value in lookups.items())
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Defines the ReadWriteLock class."""
+
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """Represent a lock held by many readers or by a single writer.
+
+    Waiting writers go before new readers, so a stream of readers cannot
+    starve them. Both sides are reentrant, and the writer may also take
+    the read side, but a reader cannot upgrade to writing.
+    """
+
+    def __init__(self):
+        """Initialize a new, free ReadWriteLock."""
+        self.__cond = threading.Condition(threading.Lock())
+        self.__readers = {}
+        self.__writer = None
+        self.__depth = 0
+        self.__waiting = 0
+
+    @contextmanager
+    def read(self):
+        """Hold the lock shared for the duration of a with block."""
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer == me:
+                self.__depth += 1
+            else:
+                if me not in self.__readers:
+                    while self.__writer is not None or self.__waiting:
+                        self.__cond.wait()
+                self.__readers[me] = self.__readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                if self.__writer == me:
+                    self.__depth -= 1
+                elif self.__readers[me] > 1:
+                    self.__readers[me] -= 1
+                else:
+                    del self.__readers[me]
+                    if not self.__readers:
+                        self.__cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """Hold the lock exclusively for the duration of a with block.
+
+        Raises:
+            RuntimeError: If the calling thread holds the read side.
+        """
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer == me:
+                self.__depth += 1
+            else:
+                if me in self.__readers:
+                    raise RuntimeError("cannot upgrade a read lock")
+                self.__waiting += 1
+                while self.__writer is not None or self.__readers:
+                    self.__cond.wait()
+                self.__waiting -= 1
+                self.__writer = me
+                self.__depth = 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__depth -= 1
+                if not self.__depth:
+                    self.__writer = None
+                    self.__cond.notify_all()
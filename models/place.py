@@ -1,7 +1,7 @@
 #!/usr/bin/python3
 """Defines the Place class."""
 
-from models.base_model import BaseModel
+from models.base_model import BaseModel, Field
 
 
 class Place(BaseModel):
@@ -21,22 +21,14 @@ class Place(BaseModel):
         amenity_ids (list): A list of Amenity ids.
     """
 
-    def __init__(self, *args, **kwargs):
-        """Initialize a new Place instance.
-
-        Args:
-            *args (any): Unused.
-            **kwargs (dict): Key/value pairs of attributes.
-        """
-        super().__init__(*args, **kwargs)
-        self.city_id = kwargs.get('city_id', '')
-        self.user_id = kwargs.get('user_id', '')
-        self.name = kwargs.get('name', '')
-        self.description = kwargs.get('description', '')
-        self.number_rooms = kwargs.get('number_rooms', 0)
-        self.number_bathrooms = kwargs.get('number_bathrooms', 0)
-        self.max_guest = kwargs.get('max_guest', 0)
-        self.price_by_night = kwargs.get('price_by_night', 0)
-        self.latitude = kwargs.get('latitude', 0.0)
-        self.longitude = kwargs.get('longitude', 0.0)
-        self.amenity_ids = kwargs.get('amenity_ids', [])
+    city_id = Field(str, references="City")
+    user_id = Field(str, references="User")
+    name = Field(str, text=True)
+    description = Field(str, text=True)
+    number_rooms = Field(int)
+    number_bathrooms = Field(int)
+    max_guest = Field(int)
+    price_by_night = Field(int)
+    latitude = Field(float)
+    longitude = Field(float)
+    amenity_ids = Field(list)
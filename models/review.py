@@ -1,6 +1,7 @@
 #!/usr/bin/python3
 """Defines the Review class."""
-from models.base_model import BaseModel
+
+from models.base_model import BaseModel, Field
 
 
 class Review(BaseModel):
@@ -12,14 +13,6 @@ class Review(BaseModel):
         text (str): The text of the review.
     """
 
-    def __init__(self, *args, **kwargs):
-        """Initialize a new Review instance.
-
-        Args:
-            *args (any): Unused.
-            **kwargs (dict): Key/value pairs of attributes.
-        """
-        super().__init__(*args, **kwargs)
-        self.place_id = kwargs.get('place_id', '')
-        self.user_id = kwargs.get('user_id', '')
-        self.text = kwargs.get('text', '')
+    place_id = Field(str, references="Place")
+    user_id = Field(str, references="User")
+    text = Field(str, text=True)
@@ -399,5 +399,42 @@ class TestHBNBCommandUpdate(unittest.TestCase):
                 self.assertFalse(HBNBCommand().onecmd(f"update {cmd} 1"))
                 self.assertEqual(correct, output.getvalue().strip())
 
+    def test_update_dictionary(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create State")
+            st_id = output.getvalue().strip()
+        HBNBCommand().onecmd(
+            "State.update(" + st_id + ", {'name': 'Lagos', 'rank': 2})")
+        st = storage.get("State", st_id)
+        self.assertEqual("Lagos", st.name)
+        self.assertEqual(2, st.rank)
+
+    def test_update_coerces_to_field_type(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create Place")
+            pl_id = output.getvalue().strip()
+        HBNBCommand().onecmd("update Place " + pl_id + " number_rooms 4")
+        HBNBCommand().onecmd(
+            "Place.update(" + pl_id + ", {'latitude': '6.5', 'max_guest': 2})")
+        pl = storage.get("Place", pl_id)
+        self.assertEqual(4, pl.number_rooms)
+        self.assertEqual(6.5, pl.latitude)
+        self.assertEqual(2, pl.max_guest)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "update Place " + pl_id + " number_rooms many"))
+            self.assertEqual("** invalid value **", output.getvalue().strip())
+        self.assertEqual(4, pl.number_rooms)
+
+    def test_update_value_is_not_evaluated(self):
+        correct = "** value missing **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create State")
+            st_id = output.getvalue().strip()
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(
+                "update State " + st_id + " __import__('os')"))
+            self.assertEqual(correct, output.getvalue().strip())
+
 if __name__ == '__main__':
     unittest.main()
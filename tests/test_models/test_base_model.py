@@ -0,0 +1,190 @@
+#!/usr/bin/python3
+"""Defines unittests for models/base_model.py.
+
+Unittest classes:
+    TestBaseModel_registry
+    TestField
+    TestBaseModel_compact
+"""
+import pickle
+import models
+import unittest
+from datetime import datetime
+from models.base_model import BaseModel, Field, classes
+from models.engine import file_storage
+from models.place import Place
+
+
+class TestBaseModel_registry(unittest.TestCase):
+    """Unittests for testing the registry of model classes."""
+
+    def test_model_classes_registered(self):
+        for name in ("BaseModel", "User", "State", "City", "Place",
+                     "Amenity", "Review"):
+            self.assertIn(name, classes)
+            self.assertEqual(name, classes[name].__name__)
+
+    def test_subclass_registers_itself(self):
+        class Booking(BaseModel):
+            pass
+        self.addCleanup(classes.pop, "Booking")
+        self.assertIs(Booking, classes["Booking"])
+        obj = file_storage.build_object({"__class__": "Booking", "id": "1"})
+        self.assertIs(Booking, type(obj))
+
+    def test_duplicate_class_name(self):
+        user_cls = classes["User"]
+        with self.assertRaises(ValueError):
+            class User(BaseModel):
+                pass
+        self.assertIs(user_cls, classes["User"])
+
+
+
+class TestField(unittest.TestCase):
+    """Unittests for testing the Field class."""
+
+    def test_schema(self):
+        fields = Place.__fields__
+        self.assertIsInstance(fields["number_rooms"], Field)
+        self.assertEqual(int, fields["number_rooms"].type)
+        self.assertEqual("City", fields["city_id"].references)
+        self.assertEqual({}, BaseModel.__fields__)
+
+    def test_defaults_set(self):
+        pl = Place()
+        self.assertEqual(0.0, pl.__getstate__()["latitude"])
+        self.assertEqual("", pl.to_dict()["name"])
+        pl.amenity_ids.append("a1")
+        self.assertEqual(["a1"], pl.amenity_ids)
+        self.assertEqual([], Place().amenity_ids)
+        self.assertEqual([], Place.amenity_ids)
+
+    def test_list_default_kept_on_first_read(self):
+        pl = Place.__new__(Place)
+        pl.amenity_ids.append("a1")
+        self.assertEqual(["a1"], pl.amenity_ids)
+        self.assertEqual([], Place.__fields__["amenity_ids"].default)
+
+    def test_every_model_sets_its_fields(self):
+        for name in ("User", "State", "City", "Place", "Amenity",
+                     "Review"):
+            cls = classes[name]
+            obj_dict = cls().to_dict()
+            for name in cls.__fields__:
+                self.assertIn(name, obj_dict)
+
+    def test_coercion(self):
+        pl = Place()
+        pl.number_rooms = "3"
+        pl.latitude = 6
+        pl.name = 42
+        self.assertEqual(3, pl.number_rooms)
+        self.assertEqual(float, type(pl.latitude))
+        self.assertEqual("42", pl.name)
+        self.assertEqual(3, pl.to_dict()["number_rooms"])
+
+    def test_invalid_values(self):
+        pl = Place()
+        with self.assertRaises(ValueError):
+            pl.number_rooms = "many"
+        with self.assertRaises(TypeError):
+            pl.amenity_ids = "a1"
+        pl.city_id = None
+        self.assertIsNone(pl.city_id)
+
+
+class CompactSpot(BaseModel, compact=True):
+    """A compact model class for the tests."""
+    name = Field(str, "")
+    rooms = Field(int, 0)
+
+
+class CompactCabin(CompactSpot):
+    """A subclass of a compact model class for the tests."""
+    beds = Field(int, 0)
+
+
+class TestBaseModel_compact(unittest.TestCase):
+    """Unittests for testing compact model classes."""
+
+    def setUp(self):
+        self.stored = set(models.storage.all())
+
+    def tearDown(self):
+        for key, obj in list(models.storage.all().items()):
+            if key not in self.stored:
+                models.storage.delete(obj)
+
+    @classmethod
+    def tearDownClass(cls):
+        classes.pop("CompactSpot", None)
+        classes.pop("CompactCabin", None)
+
+    def test_slots(self):
+        self.assertTrue(CompactSpot.__compact__)
+        self.assertTrue(CompactCabin.__compact__)
+        self.assertFalse(BaseModel.__compact__)
+        self.assertEqual({}, BaseModel.__slotted__)
+        self.assertEqual(("beds",), tuple(set(CompactCabin.__slotted__) -
+                                          set(CompactSpot.__slotted__)))
+        spot = CompactSpot()
+        spot.name = "Loft"
+        self.assertEqual({}, spot.__dict__)
+        self.assertFalse(getattr(spot, "_dynamic", False))
+        self.assertEqual("Loft", spot.name)
+        self.assertEqual(0, spot.rooms)
+
+    def test_dynamic_attribute(self):
+        spot = CompactSpot()
+        spot.color = "blue"
+        self.assertEqual({"color": "blue"}, spot.__dict__)
+        self.assertEqual("blue", spot.to_dict()["color"])
+        self.assertIn("'color': 'blue'", str(spot))
+
+    def test_to_dict_and_str(self):
+        cabin = CompactCabin()
+        cabin.rooms = "2"
+        cabin.beds = 4
+        cabin_dict = cabin.to_dict()
+        self.assertEqual(2, cabin_dict["rooms"])
+        self.assertEqual(4, cabin_dict["beds"])
+        self.assertEqual("CompactCabin", cabin_dict["__class__"])
+        self.assertEqual(cabin.id, cabin_dict["id"])
+        self.assertIn("'beds': 4", str(cabin))
+
+    def test_from_dict(self):
+        cabin = CompactCabin()
+        cabin.beds = 3
+        cabin.extra = [1]
+        copy = CompactCabin.from_dict(cabin.to_dict())
+        self.assertEqual(cabin.to_dict(), copy.to_dict())
+        self.assertEqual(datetime, type(copy.created_at))
+        self.assertEqual({"extra": [1]}, copy.__dict__)
+        self.assertEqual(0, CompactCabin.from_dict({"id": "1"}).rooms)
+
+    def test_kwargs(self):
+        spot_dict = CompactSpot().to_dict()
+        del spot_dict["__class__"]
+        spot = CompactSpot(**spot_dict)
+        self.assertEqual({}, spot.__dict__)
+        self.assertEqual(datetime, type(spot.updated_at))
+
+    def test_pickle(self):
+        cabin = CompactCabin()
+        cabin.beds = 5
+        copy = pickle.loads(pickle.dumps(cabin))
+        self.assertEqual(cabin.to_dict(), copy.to_dict())
+
+    def test_setstate_replaces(self):
+        spot = CompactSpot.from_dict(CompactSpot().to_dict())
+        spot.rooms = 2
+        spot.color = "red"
+        spot.__setstate__({"id": "1"})
+        self.assertEqual(0, spot.rooms)
+        self.assertEqual({}, spot.__dict__)
+        self.assertEqual({"id": "1"}, spot.__getstate__())
+
+
+if __name__ == "__main__":
+    unittest.main()
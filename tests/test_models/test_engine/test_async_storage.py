@@ -0,0 +1,169 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/async_storage.py.
+
+Unittest classes:
+    TestAsyncStorage
+    TestAsyncDBStorage
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from models.engine.async_storage import AsyncStorage
+from models.engine.db_storage import DBStorage
+from models.engine.file_storage import FileStorage
+from models.state import State
+
+
+class TestAsyncStorage(unittest.IsolatedAsyncioTestCase):
+    """Unittests for testing the AsyncStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = AsyncStorage(FileStorage(threadsafe=True),
+                                    batch_size=2)
+
+    async def asyncTearDown(self):
+        await self.storage.aclose()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    async def test_asave_areload(self):
+        st = State()
+        st.name = "Lagos"
+        await self.storage.asave()
+        with open("file.json", "r") as f:
+            self.assertIn("State." + st.id, json.load(f))
+        FileStorage._FileStorage__objects = {}
+        await self.storage.areload()
+        self.assertEqual("Lagos", (await self.storage.aget(State, st.id)).name)
+        self.assertEqual(1, await self.storage.acount(State))
+
+    async def test_asave_runs_off_the_loop(self):
+        threads = []
+        save = FileStorage.save
+
+        def record(storage, **kwargs):
+            threads.append(threading.current_thread())
+            save(storage, **kwargs)
+
+        State()
+        with patch.object(FileStorage, "save", autospec=True,
+                          side_effect=record):
+            await self.storage.asave()
+        self.assertEqual(1, len(threads))
+        self.assertIsNot(threading.current_thread(), threads[0])
+
+    async def test_concurrent_asaves_are_merged(self):
+        count = 0
+        save = FileStorage.save
+
+        def counted(storage, **kwargs):
+            nonlocal count
+            count += 1
+            save(storage, **kwargs)
+
+        State()
+        with patch.object(FileStorage, "save", autospec=True,
+                          side_effect=counted):
+            await asyncio.gather(*(self.storage.asave() for _ in range(5)))
+        self.assertLessEqual(count, 2)
+
+    async def test_aall(self):
+        sts = {State().id for _ in range(5)}
+        ids = {st.id async for st in self.storage.aall(State)}
+        self.assertEqual(sts, ids)
+        self.assertEqual(5, len([obj async for obj in self.storage.aall()]))
+
+    async def test_aget_runs_while_asave_encodes(self):
+        st = State()
+        blocked = []
+        to_dict = State.to_dict
+        loop = asyncio.get_running_loop()
+
+        def record(obj):
+            future = asyncio.run_coroutine_threadsafe(
+                self.storage.aget(State, st.id), loop)
+            blocked.append(future.result(5) is not st)
+            return to_dict(obj)
+        with patch.object(State, "to_dict", record):
+            await self.storage.asave()
+        self.assertEqual([False], blocked)
+
+
+class TestAsyncDBStorage(unittest.IsolatedAsyncioTestCase):
+    """Unittests for testing the AsyncStorage class over a DBStorage."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "hbnb.db")
+        self.db = DBStorage(path=self.path)
+        self.db.reload()
+        self.storage = AsyncStorage(self.db, batch_size=2)
+
+    async def asyncTearDown(self):
+        await self.storage.aclose()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+        FileStorage._FileStorage__objects = {}
+
+    def saved(self):
+        db = DBStorage(path=self.path)
+        db.reload()
+        try:
+            return db.count(State)
+        finally:
+            db.close()
+
+    async def test_asave_areload(self):
+        st = State()
+        st.name = "Lagos"
+        self.storage.new(st)
+        await self.storage.asave()
+        self.assertEqual(1, self.saved())
+        await self.storage.areload()
+        self.assertEqual("Lagos", (await self.storage.aget(State, st.id)).name)
+        self.assertEqual(1, await self.storage.acount(State))
+        self.assertEqual([st], [obj async for obj in self.storage.aall(State)])
+
+    async def test_changes_during_asave(self):
+        for _ in range(3):
+            self.storage.new(State())
+        added = []
+        to_dict = State.to_dict
+        loop = asyncio.get_running_loop()
+
+        def record(obj):
+            if not added:
+                added.append(State())
+                loop.call_soon_threadsafe(self.storage.new, added[0])
+                threading.Event().wait(0.1)
+            return to_dict(obj)
+        with patch.object(State, "to_dict", record):
+            await self.storage.asave()
+        self.assertEqual(3, self.saved())
+        self.assertEqual(4, await self.storage.acount(State))
+        await self.storage.asave()
+        self.assertEqual(4, self.saved())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+
+Unittest classes:
+    TestDBStorage
+"""
+import os
+import tempfile
+import unittest
+from models.city import City
+from models.engine.db_storage import DBStorage
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+
+class TestDBStorage(unittest.TestCase):
+    """Unittests for testing the DBStorage class."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "hbnb.db")
+        self.db = DBStorage(path=self.path)
+        self.db.reload()
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp_dir.cleanup()
+
+    def reopen(self):
+        self.db.close()
+        self.db = DBStorage(path=self.path)
+        self.db.reload()
+
+    def test_instantiation_with_arg(self):
+        with self.assertRaises(TypeError):
+            DBStorage(None)
+
+    def test_new_save_reload(self):
+        us = User()
+        us.email = "a@b.c"
+        self.db.new(us)
+        self.db.save()
+        self.reopen()
+        loaded = self.db.get(User, us.id)
+        self.assertEqual(User, type(loaded))
+        self.assertEqual("a@b.c", loaded.email)
+        self.assertIs(loaded, self.db.get("User", us.id))
+
+    def test_unsaved_objects_are_visible(self):
+        st = State()
+        self.db.new(st)
+        self.assertIn("State." + st.id, self.db.all())
+        self.assertIn("State." + st.id, self.db.all(State))
+        self.assertEqual(1, self.db.count(State))
+        self.assertEqual(0, self.db.count(City))
+
+    def test_delete(self):
+        st = State()
+        self.db.new(st)
+        self.db.save()
+        self.db.delete(st)
+        self.assertIsNone(self.db.get(State, st.id))
+        self.assertEqual(0, self.db.count(State))
+        self.db.save()
+        self.reopen()
+        self.assertEqual({}, self.db.all(State))
+
+    def test_find_by_foreign_key(self):
+        cy = City()
+        cy.state_id = "s1"
+        self.db.new(cy)
+        self.db.save()
+        self.reopen()
+        found = self.db.find_by(City, "state_id", "s1")
+        self.assertEqual(["City." + cy.id], list(found))
+        found["City." + cy.id].state_id = "s2"
+        self.db.mark_dirty(found["City." + cy.id])
+        self.assertEqual({}, self.db.find_by(City, "state_id", "s1"))
+        self.db.save()
+        self.assertEqual(1, len(self.db.find_by(City, "state_id", "s2")))
+
+    def test_filter(self):
+        pl1 = Place()
+        pl1.price_by_night = 80
+        pl1.name = "Loft"
+        pl2 = Place()
+        pl2.price_by_night = 150
+        pl2.name = "Loft"
+        self.db.new(pl1)
+        self.db.new(pl2)
+        self.db.save()
+        self.reopen()
+        found = self.db.filter(Place, price_by_night__lte=100, name="Loft")
+        self.assertEqual(["Place." + pl1.id], list(found))
+        pl3 = Place()
+        pl3.price_by_night = 90
+        self.db.new(pl3)
+        self.assertEqual(2, len(self.db.filter(Place,
+                                               price_by_night__lt=100)))
+
+    def test_filter_amenities(self):
+        pl1 = Place()
+        pl1.amenity_ids = ["wifi", "pool"]
+        pl2 = Place()
+        pl2.amenity_ids = ["wifi"]
+        self.db.new(pl1)
+        self.db.new(pl2)
+        self.db.save()
+        self.reopen()
+        self.assertEqual(["Place." + pl1.id], list(self.db.filter(
+            Place, amenity_ids__contains=["pool", "wifi"])))
+        self.assertEqual(2, len(self.db.filter(
+            Place, amenity_ids__contains="wifi")))
+
+    def test_within_and_nearest(self):
+        pl1 = Place()
+        pl1.latitude = 6.52
+        pl1.longitude = 3.38
+        pl2 = Place()
+        pl2.latitude = -18.1
+        pl2.longitude = 178.4
+        self.db.new(pl1)
+        self.db.new(pl2)
+        self.db.save()
+        self.reopen()
+        self.assertEqual(["Place." + pl1.id],
+                         list(self.db.within(Place, 6, 3, 7, 4)))
+        self.assertEqual(["Place." + pl2.id],
+                         list(self.db.within(Place, -20, 170, -10, -170)))
+        self.assertEqual(["Place." + pl2.id, "Place." + pl1.id],
+                         list(self.db.nearest(Place, -16, 179.9)))
+        self.assertEqual(1, len(self.db.nearest(Place, 6, 3, radius=100)))
+        with self.assertRaises(ValueError):
+            self.db.within(City, 0, 0, 1, 1)
+
+    def test_ordered(self):
+        for price in (120, 50, 80):
+            pl = Place()
+            pl.price_by_night = price
+            self.db.new(pl)
+        self.db.save()
+        self.reopen()
+        self.assertEqual([120, 80], [pl.price_by_night for pl in
+                                     self.db.ordered(Place, "price_by_night",
+                                                     60, reverse=True)])
+        self.assertEqual([80], [pl.price_by_night for pl in self.db.ordered(
+            Place, "price_by_night", offset=1, limit=1)])
+
+    def test_search(self):
+        for text in ("Lovely host", "Rude host, lovely view", "Noisy"):
+            rv = Review()
+            rv.text = text
+            self.db.new(rv)
+        self.db.save()
+        self.reopen()
+        found = self.db.search("lovely view", Review)
+        self.assertEqual(["Rude host, lovely view", "Lovely host"],
+                         [rv.text for rv in found.values()])
+        self.assertEqual(1, len(self.db.search("host", k=1)))
+        with self.assertRaises(ValueError):
+            self.db.search("host", User)
+
+    def test_query(self):
+        for city, price in (("c1", 120), ("c1", 50), ("c2", 80)):
+            pl = Place()
+            pl.city_id = city
+            pl.price_by_night = price
+            self.db.new(pl)
+        self.db.save()
+        self.reopen()
+        query = self.db.query(Place).where(price_by_night__gt=50)
+        self.assertEqual([120, 80], [pl.price_by_night for pl in
+                                     query.order_by("-price_by_night")])
+        self.assertEqual(1, query.where(city_id="c1").count())
+
+    def test_refresh_sees_changes_of_others(self):
+        st = State()
+        st.name = "Lagos"
+        self.db.new(st)
+        self.db.save()
+        other = DBStorage(path=self.path)
+        other.reload()
+        other.get(State, st.id).name = "Abuja"
+        other.mark_dirty(other.get(State, st.id))
+        other.save()
+        other.close()
+        self.assertEqual("Lagos", self.db.get(State, st.id).name)
+        self.db.refresh()
+        self.assertEqual("Abuja", self.db.get(State, st.id).name)
+
+
+if __name__ == "__main__":
+    unittest.main()
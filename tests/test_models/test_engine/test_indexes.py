@@ -0,0 +1,370 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/indexes.py.
+
+Unittest classes:
+    TestFieldIndex
+    TestForeignKeys
+    TestLookups
+    TestColumnStore
+    TestGridIndex
+    TestSortedIndex
+    TestTextIndex
+    TestBitmapIndex
+"""
+import json
+import unittest
+from unittest.mock import patch
+from models.city import City
+from models.engine import indexes
+from models.engine.indexes import (BitmapIndex, ColumnStore, FieldIndex,
+                                   GridIndex, SortedIndex, TextIndex,
+                                   foreign_keys, haversine, list_fields,
+                                   located, matches, numeric_fields,
+                                   sortable, split_lookup, text_fields,
+                                   tokenize)
+from models.place import Place
+from models.review import Review
+
+
+class TestFieldIndex(unittest.TestCase):
+    """Unittests for testing the FieldIndex class."""
+
+    def test_add_lookup_discard(self):
+        idx = FieldIndex("state_id")
+        cy = City()
+        cy.state_id = "s1"
+        idx.add("City.1", cy)
+        self.assertEqual({"City.1"}, idx.lookup("s1"))
+        idx.discard("City.1")
+        self.assertEqual(set(), idx.lookup("s1"))
+        idx.discard("City.1")
+
+    def test_unhashable_value_not_indexed(self):
+        idx = FieldIndex("amenity_ids")
+        cy = City()
+        cy.amenity_ids = ["a"]
+        idx.add("City.1", cy)
+        self.assertEqual(set(), idx.lookup(["a"]))
+        idx.discard("City.1")
+
+
+
+class TestForeignKeys(unittest.TestCase):
+    """Unittests for testing the foreign_keys function."""
+
+    def test_foreign_keys(self):
+        self.assertEqual(("state_id",), foreign_keys("City"))
+        self.assertEqual(("city_id", "user_id"), foreign_keys("Place"))
+        self.assertEqual(("place_id", "user_id"), foreign_keys("Review"))
+        self.assertEqual((), foreign_keys("State"))
+        self.assertEqual((), foreign_keys("Unknown"))
+
+
+class TestLookups(unittest.TestCase):
+    """Unittests for testing the lookup helpers."""
+
+    def test_numeric_fields(self):
+        self.assertEqual(("number_rooms", "number_bathrooms", "max_guest",
+                          "price_by_night", "latitude", "longitude"),
+                         numeric_fields("Place"))
+        self.assertEqual((), numeric_fields("City"))
+
+    def test_sortable(self):
+        self.assertIn("price_by_night", sortable("Place"))
+        self.assertIn("name", sortable("Place"))
+        self.assertNotIn("amenity_ids", sortable("Place"))
+        self.assertEqual((), sortable("Unknown"))
+
+    def test_list_fields(self):
+        self.assertEqual(("amenity_ids",), list_fields("Place"))
+        self.assertEqual((), list_fields("Review"))
+
+    def test_contains(self):
+        pl = Place()
+        pl.amenity_ids = ["wifi", "pool"]
+        self.assertTrue(matches(pl, {"amenity_ids__contains": ["pool"]}))
+        self.assertTrue(matches(pl, {"amenity_ids__contains": "wifi"}))
+        self.assertFalse(matches(pl, {"amenity_ids__contains":
+                                      ["wifi", "sauna"]}))
+        self.assertFalse(matches(pl, {"max_guest__contains": "wifi"}))
+
+    def test_text_fields(self):
+        self.assertEqual(("name", "description"), text_fields("Place"))
+        self.assertEqual(("text",), text_fields("Review"))
+        self.assertEqual((), text_fields("Unknown"))
+
+    def test_tokenize(self):
+        self.assertEqual(["cosy", "loft", "2", "beds"],
+                         tokenize("Cosy loft, 2 beds!"))
+
+    def test_located(self):
+        self.assertTrue(located("Place"))
+        self.assertFalse(located("City"))
+        self.assertFalse(located("Unknown"))
+
+    def test_haversine(self):
+        self.assertAlmostEqual(0.0, haversine(6.5, 3.4, 6.5, 3.4))
+        self.assertAlmostEqual(111.2, haversine(0, 0, 1, 0), places=1)
+        self.assertAlmostEqual(haversine(0, 179.5, 0, -179.5),
+                               haversine(0, 0, 0, 1))
+
+    def test_split_lookup(self):
+        self.assertEqual(("max_guest", "gte"), split_lookup("max_guest__gte"))
+        self.assertEqual(("name", "exact"), split_lookup("name"))
+        with self.assertRaises(ValueError):
+            split_lookup("name__like")
+
+    def test_matches(self):
+        pl = Place()
+        pl.name = "Loft"
+        pl.number_rooms = 3
+        self.assertTrue(matches(pl, {"name": "Loft", "number_rooms__lt": 4}))
+        self.assertFalse(matches(pl, {"number_rooms__gt": 3}))
+        pl.number_rooms = None
+        self.assertFalse(matches(pl, {"number_rooms__lt": 4}))
+
+
+class TestColumnStore(unittest.TestCase):
+    """Unittests for testing the ColumnStore class."""
+
+    def setUp(self):
+        self.store = ColumnStore(("price_by_night", "latitude"))
+        self.places = []
+        for price in (50, 80, 120, 200):
+            pl = Place()
+            pl.price_by_night = price
+            pl.latitude = price / 10
+            self.places.append(pl)
+            self.store.add(pl.id, pl)
+
+    def test_select(self):
+        ids = [pl.id for pl in self.places]
+        self.assertEqual(ids[1:3], self.store.select(
+            {"price_by_night__gte": 80, "latitude__lt": 20.0}))
+        self.assertEqual([ids[0]], self.store.select({"price_by_night": 50}))
+        self.assertEqual([], self.store.select({"latitude__gt": 100}))
+
+    def test_select_without_numpy(self):
+        with patch.object(indexes, "numpy", None):
+            self.test_select()
+
+    def test_update_and_discard(self):
+        pl0, pl1, pl2, pl3 = self.places
+        pl0.price_by_night = 300
+        self.store.add(pl0.id, pl0)
+        self.store.discard(pl1.id)
+        self.store.discard(pl1.id)
+        self.assertEqual(3, len(self.store))
+        self.assertEqual(sorted([pl0.id, pl3.id]), sorted(
+            self.store.select({"price_by_night__gt": 150})))
+        self.store.discard(pl3.id)
+        self.assertEqual([pl2.id], self.store.select({"latitude__gt": 5}))
+
+    def test_none_never_matches(self):
+        pl = Place()
+        pl.price_by_night = None
+        self.store.add(pl.id, pl)
+        self.assertNotIn(pl.id, self.store.select({"price_by_night__gte": 0}))
+        self.assertNotIn(pl.id, self.store.select({"price_by_night__lt": 0}))
+
+    def test_empty(self):
+        self.assertEqual([], ColumnStore(("max_guest",)).select(
+            {"max_guest": 1}))
+
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        self.grid = GridIndex()
+        self.places = {}
+        for name, lat, lon in (("lagos", 6.52, 3.38), ("ikeja", 6.60, 3.35),
+                               ("abuja", 9.07, 7.40), ("suva", -18.1, 178.4),
+                               ("apia", -13.8, -171.8)):
+            pl = Place()
+            pl.latitude = lat
+            pl.longitude = lon
+            self.places[name] = pl
+            self.grid.add(name, pl)
+
+    def test_within(self):
+        self.assertEqual({"lagos", "ikeja"},
+                         set(self.grid.within(6, 3, 7, 4)))
+        self.assertEqual({"suva", "apia"},
+                         set(self.grid.within(-20, 170, -10, -170)))
+        self.assertEqual([], self.grid.within(10, 0, 20, 10))
+        self.assertEqual(5, len(self.grid.within(-90, -180, 90, 180)))
+
+    def test_nearest(self):
+        found = self.grid.nearest(6.45, 3.40, k=2)
+        self.assertEqual(["lagos", "ikeja"], [key for _, key in found])
+        self.assertLess(found[0][0], found[1][0])
+        found = self.grid.nearest(-16, 179.9, k=1)
+        self.assertEqual(["suva"], [key for _, key in found])
+        self.assertEqual(5, len(self.grid.nearest(0, 0)))
+        self.assertEqual([], self.grid.nearest(0, 0, k=0))
+
+    def test_nearest_radius(self):
+        found = self.grid.nearest(6.52, 3.38, radius=50)
+        self.assertEqual(["lagos", "ikeja"], [key for _, key in found])
+        found = self.grid.nearest(6.52, 3.38, k=1, radius=50)
+        self.assertEqual(["lagos"], [key for _, key in found])
+
+    def test_update_and_discard(self):
+        lagos = self.places["lagos"]
+        lagos.latitude = 9.0
+        lagos.longitude = 7.5
+        self.grid.add("lagos", lagos)
+        self.assertEqual(["ikeja"], self.grid.within(6, 3, 7, 4))
+        self.grid.discard("lagos")
+        self.grid.discard("lagos")
+        self.assertEqual(4, len(self.grid))
+        self.places["ikeja"].latitude = None
+        self.grid.add("ikeja", self.places["ikeja"])
+        self.assertEqual(3, len(self.grid))
+
+
+
+class TestSortedIndex(unittest.TestCase):
+    """Unittests for testing the SortedIndex class."""
+
+    def setUp(self):
+        self.index = SortedIndex("price_by_night")
+        for key, price in (("d", 120), ("a", 50), ("c", 80), ("b", 80),
+                           ("e", 200)):
+            pl = Place()
+            pl.price_by_night = price
+            self.index.add(key, pl)
+
+    def test_slice(self):
+        self.assertEqual(["a", "b", "c", "d", "e"], self.index.slice())
+        self.assertEqual(["a", "b", "c", "d"], self.index.slice(50, 120))
+        self.assertEqual(["b", "c"], self.index.slice(
+            50, 120, low_open=True, high_open=True))
+        self.assertEqual(["d", "c", "b"], self.index.slice(
+            60, 150, reverse=True))
+        self.assertEqual([], self.index.slice(300))
+        self.assertEqual([], self.index.slice(150, 60))
+
+    def test_pagination(self):
+        self.assertEqual(["b", "c"], self.index.slice(offset=1, limit=2))
+        self.assertEqual(["e"], self.index.slice(offset=4, limit=2))
+        self.assertEqual([], self.index.slice(offset=9))
+        self.assertEqual(["c", "b"], self.index.slice(
+            reverse=True, offset=2, limit=2))
+
+    def test_update_and_discard(self):
+        pl = Place()
+        pl.price_by_night = 10
+        self.index.add("c", pl)
+        self.assertEqual(["c", "a", "b"], self.index.slice(high=80))
+        self.index.discard("b")
+        self.index.discard("b")
+        pl.price_by_night = None
+        self.index.add("a", pl)
+        self.assertEqual(["c", "d", "e"], self.index.slice())
+        self.assertEqual(3, len(self.index))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestTextIndex(unittest.TestCase):
+    """Unittests for testing the TextIndex class."""
+
+    def setUp(self):
+        self.index = TextIndex(("text",))
+        for key, text in (("a", "Great pool, great view"),
+                          ("b", "Noisy street but a great host"),
+                          ("c", "The pool was closed and the wifi slow "
+                                "and the host never answered")):
+            rv = Review()
+            rv.text = text
+            self.index.add(key, rv)
+
+    def test_search(self):
+        self.assertEqual(["a", "c"], [key for _, key in
+                                      self.index.search("pool")])
+        self.assertEqual(["a", "b"], [key for _, key in
+                                      self.index.search("great")])
+        self.assertEqual(["b"], [key for _, key in
+                                 self.index.search("host street", 1)])
+        self.assertEqual([], self.index.search("sauna"))
+        self.assertEqual(3, len(self.index.search("the great", None)))
+
+    def test_update_and_discard(self):
+        rv = Review()
+        rv.text = "Sauna"
+        self.index.add("a", rv)
+        self.index.discard("c")
+        self.index.discard("c")
+        self.assertEqual([], self.index.search("pool"))
+        self.assertEqual(["a"], [key for _, key in
+                                 self.index.search("sauna")])
+        self.assertEqual({"a", "b"}, set(self.index.keys()))
+
+    def test_dict_round_trip(self):
+        copy = TextIndex.from_dict(self.index.to_dict())
+        self.assertEqual(self.index.search("great host"),
+                         copy.search("great host"))
+        copy.discard("a")
+        self.assertEqual(["c"], [key for _, key in copy.search("pool")])
+        self.assertEqual(["a", "c"], [key for _, key in
+                                      self.index.search("pool")])
+
+    def test_dict_unchanged_by_later_changes(self):
+        saved = json.dumps(self.index.to_dict())
+        index_dict = self.index.to_dict()
+        rv = Review()
+        rv.text = "Pool and sauna"
+        self.index.add("d", rv)
+        self.index.discard("a")
+        self.assertEqual(saved, json.dumps(index_dict))
+        self.assertEqual(["d", "c"], [key for _, key in
+                                      self.index.search("pool")])
+
+
+class TestBitmapIndex(unittest.TestCase):
+    """Unittests for testing the BitmapIndex class."""
+
+    def setUp(self):
+        self.places = {}
+        for key, amenities in (("a", ["wifi", "pool"]), ("b", ["wifi"]),
+                               ("c", ["wifi", "pool", "parking"]),
+                               ("d", None)):
+            pl = Place()
+            pl.amenity_ids = amenities
+            self.places[key] = pl
+        self.index = BitmapIndex("amenity_ids")
+        self.index.update(self.places.items())
+
+    def find(self, wanted):
+        return self.index.decode(self.index.bitmap(wanted))
+
+    def test_bitmap(self):
+        self.assertEqual(["a", "b", "c"], self.find("wifi"))
+        self.assertEqual(["a", "c"], self.find(["wifi", "pool"]))
+        self.assertEqual(["c"], self.find(["pool", "parking"]))
+        self.assertEqual([], self.find(["pool", "sauna"]))
+        self.assertEqual(4, len(self.index))
+
+    def test_update_and_discard(self):
+        self.index.discard("a")
+        self.index.discard("a")
+        pl = Place()
+        pl.amenity_ids = ["pool"]
+        self.index.add("e", pl)
+        self.index.add("b", pl)
+        self.assertEqual(["e", "b", "c"], self.find("pool"))
+        self.assertEqual(["c"], self.find("wifi"))
+        self.assertEqual(4, len(self.index))
+
+    def test_same_as_one_by_one(self):
+        index = BitmapIndex("amenity_ids")
+        for key, pl in self.places.items():
+            index.add(key, pl)
+        for wanted in ("wifi", "pool", "parking", ["wifi", "pool"]):
+            self.assertEqual(self.find(wanted),
+                             index.decode(index.bitmap(wanted)))
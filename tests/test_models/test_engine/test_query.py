@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/query.py.
+
+Unittest classes:
+    TestQuery
+"""
+import unittest
+import models
+from models.engine.file_storage import FileStorage
+from models.engine.query import Query
+from models.place import Place
+from models.review import Review
+
+
+class TestQuery(unittest.TestCase):
+    """Unittests for testing the Query class."""
+
+    def setUp(self):
+        FileStorage._FileStorage__objects = {}
+        self.places = []
+        for city, price, amenities in (("c1", 120, ["wifi"]),
+                                       ("c1", 50, ["wifi", "pool"]),
+                                       ("c2", 80, ["pool"]),
+                                       ("c1", 80, ["wifi", "pool"]),
+                                       ("c2", None, [])):
+            pl = Place()
+            pl.city_id = city
+            pl.price_by_night = price
+            pl.amenity_ids = amenities
+            self.places.append(pl)
+
+    def tearDown(self):
+        FileStorage._FileStorage__objects = {}
+
+    def prices(self, query):
+        return [pl.price_by_night for pl in query]
+
+    def test_query(self):
+        query = models.storage.query(Place)
+        self.assertIsInstance(query, Query)
+        self.assertEqual(5, query.count())
+        self.assertEqual(0, models.storage.query(Review).count())
+
+    def test_where(self):
+        query = models.storage.query(Place).where(city_id="c1")
+        self.assertEqual(3, query.count())
+        self.assertEqual(2, query.where(price_by_night__lte=100).count())
+        self.assertEqual(3, query.count())
+        self.assertEqual(1, models.storage.query(Place).where(
+            amenity_ids__contains=["wifi", "pool"],
+            price_by_night__gt=60).count())
+        with self.assertRaises(ValueError):
+            query.where(price_by_night__in=[1])
+
+    def test_order_by(self):
+        query = models.storage.query(Place).order_by("price_by_night")
+        self.assertEqual([50, 80, 80, 120], self.prices(query))
+        self.assertEqual([80, 50], self.prices(query.where(
+            city_id="c1", price_by_night__lt=100).order_by(
+                "-price_by_night")))
+        self.assertEqual([80, 80], self.prices(query.where(
+            price_by_night__gt=50, price_by_night__lt=120)))
+        self.assertEqual(["c1", "c2"], sorted(pl.city_id for pl in query.where(
+            price_by_night=80)))
+
+    def test_offset_and_limit(self):
+        query = models.storage.query(Place).order_by("-price_by_night")
+        self.assertEqual([80, 80], self.prices(query.offset(1).limit(2)))
+        self.assertEqual([120], self.prices(query.limit(1)))
+        self.assertEqual(120, query.first().price_by_night)
+        self.assertEqual([], self.prices(query.offset(9)))
+        self.assertIsNone(query.where(city_id="c3").first())
+        with self.assertRaises(ValueError):
+            query.limit(-1)
+
+    def test_lazy(self):
+        query = models.storage.query(Place).where(price_by_night__gte=100)
+        pl = Place()
+        pl.price_by_night = 300
+        self.assertEqual(2, query.count())
+        objs = iter(query)
+        pl.price_by_night = 10
+        self.assertEqual([120], self.prices(objs))
+
+    def test_explain(self):
+        query = models.storage.query(Place)
+        self.assertEqual("query Place\nscan", query.explain())
+        self.assertIn("find_by city_id='c1'", query.where(
+            city_id="c1").order_by("price_by_night").explain())
+        self.assertIn("ordered price_by_night from 60.0 to None",
+                      query.where(price_by_night__gte=60).order_by(
+                          "price_by_night").explain())
+        self.assertIn("filter amenity_ids__contains=['pool']", query.where(
+            amenity_ids__contains=["pool"], city_id__lt="c2").explain())
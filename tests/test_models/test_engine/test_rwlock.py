@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/rwlock.py.
+
+Unittest classes:
+    TestReadWriteLock
+"""
+import threading
+import unittest
+from models.engine.rwlock import ReadWriteLock
+
+
+class TestReadWriteLock(unittest.TestCase):
+    """Unittests for testing the ReadWriteLock class."""
+
+    def test_readers_share(self):
+        lock = ReadWriteLock()
+        inside = threading.Barrier(3, timeout=5)
+
+        def reader():
+            with lock.read():
+                inside.wait()
+
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        inside.wait()
+        for thread in threads:
+            thread.join()
+
+    def test_writer_excludes_readers(self):
+        lock = ReadWriteLock()
+        seen = []
+
+        def reader():
+            with lock.read():
+                seen.append(1)
+
+        with lock.write():
+            thread = threading.Thread(target=reader)
+            thread.start()
+            thread.join(0.1)
+            self.assertEqual([], seen)
+        thread.join(5)
+        self.assertEqual([1], seen)
+
+    def test_reentrant(self):
+        lock = ReadWriteLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                pass
+        with lock.write():
+            pass
+
+    def test_no_upgrade(self):
+        lock = ReadWriteLock()
+        with lock.read():
+            with self.assertRaises(RuntimeError):
+                with lock.write():
+                    pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,14 +4,28 @@
 Unittest classes:
     TestFileStorageInstantiation
     TestFileStorageMethods
+    TestFileStorageJournal
+    TestFileStorageLazy
+    TestFileStorageThreads
+    TestFileStorageProcesses
+    TestFileStorageParallelReload
+    TestIterJsonMembers
 """
 import os
+import io
 import json
 import models
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
 from datetime import datetime
+from unittest.mock import patch
 from models.base_model import BaseModel
-from models.engine.file_storage import FileStorage
+from models.engine.file_storage import FileStorage, iter_json_members
+from models.engine.file_storage import load_snapshot_range
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -39,6 +53,10 @@ class TestFileStorageInstantiation(unittest.TestCase):
     def test_storage_initializes(self):
         self.assertEqual(type(models.storage), FileStorage)
 
+    def test_instantiation_bad_durability(self):
+        with self.assertRaises(ValueError):
+            FileStorage(durability="sometimes")
+
 
 class TestFileStorageMethods(unittest.TestCase):
     """Unittests for testing methods of the FileStorage class."""
@@ -148,6 +166,889 @@ class TestFileStorageMethods(unittest.TestCase):
         self.assertIn("Amenity." + am.id, objs)
         self.assertIn("Review." + rv.id, objs)
 
+    def test_all_by_class(self):
+        us = User()
+        st = State()
+        self.assertEqual({"User." + us.id: us}, models.storage.all(User))
+        self.assertEqual({"State." + st.id: st}, models.storage.all("State"))
+        self.assertEqual({}, models.storage.all(Review))
+
+    def test_count(self):
+        us = User()
+        User()
+        State()
+        self.assertEqual(2, models.storage.count(User))
+        self.assertEqual(1, models.storage.count("State"))
+        self.assertEqual(3, models.storage.count())
+        models.storage.delete(us)
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_partitions_follow_replaced_objects(self):
+        User()
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(0, models.storage.count(User))
+        self.assertEqual({}, models.storage.all(User))
+
+    def test_find_by_foreign_key(self):
+        st = State()
+        cy1 = City()
+        cy1.state_id = st.id
+        cy2 = City()
+        cy2.state_id = st.id
+        City().state_id = "other"
+        self.assertEqual({"City." + cy1.id: cy1, "City." + cy2.id: cy2},
+                         models.storage.find_by(City, "state_id", st.id))
+
+    def test_find_by_follows_changes(self):
+        pl = Place()
+        pl.city_id = "c1"
+        self.assertEqual([pl], list(
+            models.storage.find_by(Place, "city_id", "c1").values()))
+        pl.city_id = "c2"
+        rv = Review()
+        rv.place_id = pl.id
+        self.assertEqual({}, models.storage.find_by(Place, "city_id", "c1"))
+        self.assertEqual([pl], list(
+            models.storage.find_by(Place, "city_id", "c2").values()))
+        models.storage.delete(pl)
+        self.assertEqual({}, models.storage.find_by(Place, "city_id", "c2"))
+        self.assertEqual([rv], list(
+            models.storage.find_by(Review, "place_id", pl.id).values()))
+
+    def test_find_by_unindexed_field(self):
+        st = State()
+        st.name = "Lagos"
+        self.assertEqual({"State." + st.id: st},
+                         models.storage.find_by(State, "name", "Lagos"))
+
+    def test_filter_numeric_fields(self):
+        pl1 = Place()
+        pl1.price_by_night = 80
+        pl1.max_guest = 4
+        pl2 = Place()
+        pl2.price_by_night = 150
+        pl2.max_guest = 6
+        pl3 = Place()
+        pl3.price_by_night = 60
+        pl3.max_guest = 1
+        self.assertEqual({"Place." + pl1.id: pl1}, models.storage.filter(
+            Place, price_by_night__lte=100, max_guest__gte=2))
+        pl3.max_guest = 2
+        models.storage.delete(pl1)
+        self.assertEqual({"Place." + pl3.id: pl3}, models.storage.filter(
+            Place, price_by_night__lte="100", max_guest__gte=2))
+        self.assertEqual({"Place." + pl2.id: pl2},
+                         models.storage.filter(Place, max_guest=6))
+
+    def test_filter_other_fields(self):
+        pl1 = Place()
+        pl1.name = "Loft"
+        pl1.latitude = 6.5
+        pl2 = Place()
+        pl2.name = "Loft"
+        self.assertEqual({"Place." + pl1.id: pl1}, models.storage.filter(
+            "Place", name="Loft", latitude__gt=6))
+        self.assertEqual(2, len(models.storage.filter(Place, name="Loft")))
+        self.assertEqual({}, models.storage.filter(User, email="x"))
+
+    def test_filter_amenities(self):
+        pl1 = Place()
+        pl1.amenity_ids = ["wifi", "pool"]
+        pl1.price_by_night = 80
+        pl2 = Place()
+        pl2.amenity_ids = ["wifi"]
+        pl2.price_by_night = 60
+        self.assertEqual({"Place." + pl1.id: pl1}, models.storage.filter(
+            Place, amenity_ids__contains=["pool", "wifi"]))
+        self.assertEqual(2, len(models.storage.filter(
+            Place, amenity_ids__contains="wifi")))
+        pl2.amenity_ids.append("pool")
+        models.storage.mark_dirty(pl2)
+        self.assertEqual({"Place." + pl2.id: pl2}, models.storage.filter(
+            Place, amenity_ids__contains=["wifi", "pool"],
+            price_by_night__lt=70))
+        for _ in range(20):
+            Place().price_by_night = 50
+        self.assertEqual({"Place." + pl2.id: pl2}, models.storage.filter(
+            Place, amenity_ids__contains="pool", price_by_night__lt="70"))
+        self.assertEqual({}, models.storage.filter(
+            Place, amenity_ids__contains=["wifi", "sauna"]))
+
+    def test_filter_invalid(self):
+        Place()
+        with self.assertRaises(ValueError):
+            models.storage.filter(Place, price_by_night__in=[1])
+        with self.assertRaises(ValueError):
+            models.storage.filter(Place, price_by_night__lte="cheap")
+
+    def test_within_and_nearest(self):
+        pl1 = Place()
+        pl1.latitude = 6.52
+        pl1.longitude = 3.38
+        pl2 = Place()
+        pl2.latitude = 9.07
+        pl2.longitude = 7.40
+        self.assertEqual({"Place." + pl1.id: pl1},
+                         models.storage.within(Place, 6, 3, 7, 4))
+        self.assertEqual(["Place." + pl2.id, "Place." + pl1.id], list(
+            models.storage.nearest(Place, 9, 7.5, k=2)))
+        pl2.latitude = 6.60
+        pl2.longitude = 3.35
+        self.assertEqual(2, len(models.storage.within("Place", 6, 3, 7, 4)))
+        models.storage.delete(pl1)
+        self.assertEqual({"Place." + pl2.id: pl2},
+                         models.storage.nearest(Place, 6.5, 3.4, radius=50))
+        with self.assertRaises(ValueError):
+            models.storage.nearest(City, 0, 0)
+
+    def test_ordered(self):
+        places = []
+        for price in (120, 50, 80, 200):
+            pl = Place()
+            pl.price_by_night = price
+            places.append(pl)
+        self.assertEqual([50, 80, 120], [pl.price_by_night for pl in
+                                         models.storage.ordered(
+                                             Place, "price_by_night",
+                                             50, 120)])
+        places[1].price_by_night = 300
+        models.storage.delete(places[0])
+        self.assertEqual([places[1], places[3]], list(models.storage.ordered(
+            Place, "price_by_night", reverse=True, limit=2)))
+        self.assertEqual([places[3]], list(models.storage.ordered(
+            "Place", "price_by_night", offset=1, limit=1)))
+        with self.assertRaises(ValueError):
+            models.storage.ordered(Place, "amenity_ids")
+
+    def test_ordered_pages(self):
+        for i in range(2500):
+            Place().max_guest = i % 7
+        guests = [pl.max_guest for pl in models.storage.ordered(
+            Place, "max_guest", offset=10, limit=2400)]
+        self.assertEqual(2400, len(guests))
+        self.assertEqual(sorted(guests), guests)
+        self.assertEqual(2500, len(list(models.storage.ordered(
+            Place, "max_guest"))))
+
+    def test_search(self):
+        pool = Place()
+        pool.name = "Sunny loft with a pool"
+        quiet = Place()
+        quiet.name = "Quiet loft"
+        quiet.description = "Far from the pool"
+        am = Amenity()
+        am.name = "Pool"
+        found = models.storage.search("pool", Place)
+        self.assertEqual(["Place." + pool.id, "Place." + quiet.id],
+                         list(found))
+        self.assertEqual(3, len(models.storage.search("POOL")))
+        self.assertEqual(1, len(models.storage.search("pool", Place, k=1)))
+        pool.name = "Sunny loft"
+        models.storage.delete(quiet)
+        self.assertEqual({"Place." + pool.id: pool},
+                         models.storage.search("sunny", "Place"))
+        self.assertEqual({}, models.storage.search("pool", Place))
+        with self.assertRaises(ValueError):
+            models.storage.search("pool", User)
+
+    def test_search_index_saved(self):
+        self.addCleanup(lambda: os.path.exists("file.json.text") and
+                        os.remove("file.json.text"))
+        first = Review()
+        first.text = "Lovely host"
+        models.storage.search("host", Review)
+        models.storage.save()
+        self.assertTrue(os.path.exists("file.json.text"))
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        indexes = FileStorage._FileStorage__indexes
+        self.assertEqual(1, len(indexes["Review"]["text"]))
+        second = Review()
+        second.text = "Rude host"
+        self.assertEqual(2, len(models.storage.search("host", Review)))
+        with open("file.json", "a") as f:
+            f.write(" ")
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertNotIn("Review", FileStorage._FileStorage__indexes)
+
+    def test_search_index_save_lists_changes(self):
+        self.addCleanup(lambda: os.path.exists("file.json.text") and
+                        os.remove("file.json.text"))
+        first = Review()
+        first.text = "Lovely host"
+        second = Review()
+        second.text = "Rude host"
+        models.storage.search("host", Review)
+        models.storage.save()
+        with open("file.json.text") as f:
+            saved = f.readlines()[1]
+        first.text = "Lovely view"
+        models.storage.save()
+        with open("file.json.text") as f:
+            lines = f.readlines()
+        self.assertEqual(saved, lines[1])
+        self.assertEqual(["Review." + first.id], json.loads(lines[2])[1])
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("Review", FileStorage._FileStorage__indexes)
+        self.assertEqual(["Review." + second.id],
+                         list(models.storage.search("host", Review)))
+
+    def test_reload_legacy_string_numbers(self):
+        with open("file.json", "w") as f:
+            json.dump({"Place.{}".format(i): {
+                "__class__": "Place", "id": str(i),
+                "created_at": "2017-09-28T21:05:54.119427",
+                "updated_at": "2017-09-28T21:05:54.119427",
+                "price_by_night": price, "latitude": lat,
+                "longitude": "3.4"}
+                for i, (price, lat) in enumerate(
+                    (("100", "6.5"), (50, 6.6), ("75", 7)))}, f)
+        models.storage.reload()
+        self.assertEqual([50, 75, 100], [pl.price_by_night for pl in
+                                         models.storage.ordered(
+                                             Place, "price_by_night")])
+        self.assertEqual(["Place.0", "Place.1"], list(models.storage.nearest(
+            Place, 6.5, 3.4, k=2)))
+        self.assertEqual(1, models.storage.query(Place).where(
+            price_by_night__gt=60).order_by("price_by_night").offset(
+                1).count())
+
+    def test_delete(self):
+        bm = BaseModel()
+        models.storage.delete(bm)
+        self.assertNotIn("BaseModel." + bm.id, models.storage.all())
+        models.storage.delete(None)
+
+    def test_save_reuses_clean_objects(self):
+        bm = BaseModel()
+        us = User()
+        models.storage.save()
+        cache = FileStorage._FileStorage__cache
+        self.assertIn("BaseModel." + bm.id, cache)
+        self.assertIn("User." + us.id, cache)
+        bm.name = "changed"
+        self.assertNotIn("BaseModel." + bm.id, cache)
+        self.assertIn("User." + us.id, cache)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual("changed", saved["BaseModel." + bm.id]["name"])
+
+    def test_save_sees_lists_changed_in_place(self):
+        pl = Place()
+        pl.amenity_ids = ["a"]
+        models.storage.save()
+        pl.amenity_ids.append("b")
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(["a", "b"], saved["Place." + pl.id]["amenity_ids"])
+        self.assertNotIn("Place." + pl.id, FileStorage._FileStorage__cache)
+
+    def test_save_follows_objects_whose_id_changed(self):
+        st = State()
+        st.name = "A"
+        obj_key = "State." + st.id
+        models.storage.save()
+        st.id = "renamed"
+        st.name = "B"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual("B", saved[obj_key]["name"])
+        models.storage.delete(st)
+        self.assertNotIn(obj_key, models.storage.all())
+
+    def test_failed_save_keeps_previous_file(self):
+        bm = BaseModel()
+        models.storage.save()
+        bm.bad = object()
+        with self.assertRaises(TypeError):
+            models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+        del bm.bad
+
+    def test_save_each_durability(self):
+        bm = BaseModel()
+        for level in FileStorage.durability_levels:
+            FileStorage(durability=level).save()
+            with open("file.json", "r") as f:
+                self.assertIn("BaseModel." + bm.id, json.load(f))
+        self.assertFalse(os.path.exists("file.json.tmp"))
+
+    def test_group_commit_merges_saves(self):
+        storage = FileStorage(group_window=0.05)
+        write = FileStorage._FileStorage__write
+        with patch.object(FileStorage, "_FileStorage__write",
+                          autospec=True, side_effect=write) as mock_write:
+            for _ in range(50):
+                BaseModel()
+                storage.save()
+            bm = BaseModel()
+            storage.save(wait=True)
+            self.assertLessEqual(mock_write.call_count, 2)
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_group_commit_size_limit(self):
+        storage = FileStorage(group_window=60, group_size=3)
+        bm = BaseModel()
+        storage.save()
+        storage.save()
+        storage.save(wait=True)
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_flush(self):
+        storage = FileStorage(group_window=60)
+        bm = BaseModel()
+        storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        storage.flush()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_batch_saves_once(self):
+        write = FileStorage._FileStorage__write
+        with patch.object(FileStorage, "_FileStorage__write",
+                          autospec=True, side_effect=write) as mock_write:
+            with models.storage.batch():
+                for _ in range(10):
+                    st = State()
+                    st.save()
+                self.assertEqual(0, mock_write.call_count)
+            self.assertEqual(1, mock_write.call_count)
+        with open("file.json", "r") as f:
+            self.assertIn("State." + st.id, f.read())
+
+    def test_batch_rolls_back_on_error(self):
+        kept = State()
+        kept.name = "Lagos"
+        gone = City()
+        with self.assertRaises(KeyError):
+            with models.storage.batch():
+                created = Place()
+                kept.name = "Abuja"
+                kept.extra = 1
+                models.storage.delete(gone)
+                with models.storage.batch():
+                    raise KeyError("abort")
+        objs = models.storage.all()
+        self.assertNotIn("Place." + created.id, objs)
+        self.assertIs(kept, objs["State." + kept.id])
+        self.assertEqual("Lagos", kept.name)
+        self.assertFalse(hasattr(kept, "extra"))
+        self.assertIs(gone, objs["City." + gone.id])
+        self.assertEqual(1, models.storage.count(City))
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_batch_rolls_back_list_holders(self):
+        pl = Place()
+        pl.name = "old"
+        pl.amenity_ids = ["a1"]
+        models.storage.save()
+        with self.assertRaises(KeyError):
+            with models.storage.batch():
+                pl.name = "new"
+                pl.amenity_ids = ["a2"]
+                raise KeyError("abort")
+        self.assertEqual("old", pl.name)
+        self.assertEqual(["a1"], pl.amenity_ids)
+
+    def test_mark_dirty_ignores_unstored_objects(self):
+        bm = BaseModel(id="345")
+        models.storage.mark_dirty(bm)
+        self.assertNotIn("BaseModel.345", FileStorage._FileStorage__dirty)
+
+
+class TestFileStorageJournal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    files = ("file.json", "file.json.log", "file.json.log.old")
+
+    def setUp(self):
+        for name in self.files:
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(journal=True)
+
+    def tearDown(self):
+        for name in self.files:
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_appends_only_changes(self):
+        bm = BaseModel()
+        self.storage.save()
+        with open("file.json.log", "r") as f:
+            self.assertEqual(1, len(f.readlines()))
+        BaseModel()
+        self.storage.save()
+        with open("file.json.log", "r") as f:
+            self.assertEqual(2, len(f.readlines()))
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_reload_replays_journal(self):
+        bm = BaseModel()
+        st = State()
+        self.storage.save()
+        bm.name = "updated"
+        self.storage.new(bm)
+        self.storage.delete(st)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        objs = self.storage.all()
+        self.assertIn("BaseModel." + bm.id, objs)
+        self.assertEqual("updated", objs["BaseModel." + bm.id].name)
+        self.assertNotIn("State." + st.id, objs)
+
+    def test_reload_ignores_torn_record(self):
+        bm = BaseModel()
+        self.storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('{"BaseModel.x": {"id": ')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("BaseModel." + bm.id, self.storage.all())
+        self.assertNotIn("BaseModel.x", self.storage.all())
+
+    def test_checkpoint_replaces_log_with_snapshot(self):
+        bm = BaseModel()
+        self.storage.save()
+        self.storage.checkpoint()
+        self.assertFalse(os.path.exists("file.json.log"))
+        self.assertFalse(os.path.exists("file.json.log.old"))
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, json.load(f))
+
+    def test_reload_replays_old_segment_first(self):
+        bm = BaseModel()
+        self.storage.save()
+        os.rename("file.json.log", "file.json.log.old")
+        bm.name = "newer"
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual("newer",
+                         self.storage.all()["BaseModel." + bm.id].name)
+
+    def test_background_compaction(self):
+        storage = FileStorage(journal=True, compact_ratio=0.5,
+                              compact_min_bytes=0)
+        bm = BaseModel()
+        storage.save()
+        lock = FileStorage._FileStorage__compact_lock
+        with lock:
+            self.assertTrue(os.path.exists("file.json"))
+        self.assertFalse(os.path.exists("file.json.log.old"))
+        FileStorage._FileStorage__objects = {}
+        storage.reload()
+        self.assertIn("BaseModel." + bm.id, storage.all())
+
+    def test_background_checkpoint_encodes_in_its_thread(self):
+        bm = BaseModel()
+        bm.name = "kept"
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        threads = []
+        to_dict = BaseModel.to_dict
+
+        def record(obj):
+            threads.append(threading.current_thread())
+            return to_dict(obj)
+        with patch.object(BaseModel, "to_dict", record):
+            self.storage.checkpoint(background=True)
+            with FileStorage._FileStorage__compact_lock:
+                pass
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertNotIn("BaseModel." + bm.id,
+                         FileStorage._FileStorage__cache)
+        with open("file.json", "r") as f:
+            self.assertEqual("kept",
+                             json.load(f)["BaseModel." + bm.id]["name"])
+
+
+class TestFileStorageLazy(unittest.TestCase):
+    """Unittests for testing the lazy mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.us = User()
+        self.st = State()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(lazy=True)
+        self.storage.reload()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+
+    def test_reload_builds_nothing(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(2, self.storage.count())
+        self.assertEqual(1, self.storage.count(State))
+        self.assertEqual(1, self.storage.count("User"))
+
+    def test_get_builds_one_object(self):
+        st = self.storage.get(State, self.st.id)
+        self.assertEqual(State, type(st))
+        self.assertEqual(self.st.id, st.id)
+        self.assertEqual(["State." + self.st.id],
+                         list(FileStorage._FileStorage__objects))
+        self.assertIsNone(self.storage.get(State, "missing"))
+
+    def test_all_builds_everything(self):
+        objs = self.storage.all()
+        self.assertIn("State." + self.st.id, objs)
+        self.assertEqual({}, FileStorage._FileStorage__raw)
+
+    def test_save_keeps_unbuilt_objects(self):
+        self.storage.get(State, self.st.id).name = "Lagos"
+        self.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual("Lagos", saved["State." + self.st.id]["name"])
+        self.assertIn("User." + self.us.id, saved)
+
+
+class TestFileStorageThreads(unittest.TestCase):
+    """Unittests for testing the thread-safe mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage(threadsafe=True)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_all_returns_copy(self):
+        bm = BaseModel()
+        objs = self.storage.all()
+        self.assertIsNot(FileStorage._FileStorage__objects, objs)
+        BaseModel()
+        self.assertEqual({"BaseModel." + bm.id: bm}, objs)
+
+    def test_readers_with_writer(self):
+        errors = []
+        done = threading.Event()
+
+        def read():
+            try:
+                while not done.is_set():
+                    for obj in self.storage.all().values():
+                        self.storage.get(Place, obj.id)
+                    self.storage.count(Place)
+                    self.storage.find_by(Place, "city_id", "c1")
+            except Exception as exc:
+                errors.append(exc)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for thread in readers:
+            thread.start()
+        try:
+            for i in range(300):
+                pl = Place()
+                pl.city_id = "c1"
+                if i % 3 == 0:
+                    self.storage.delete(pl)
+                if i % 50 == 0:
+                    self.storage.save()
+        finally:
+            done.set()
+            for thread in readers:
+                thread.join()
+        self.assertEqual([], errors)
+        self.assertEqual(200, self.storage.count(Place))
+        self.assertEqual(
+            200, len(self.storage.find_by(Place, "city_id", "c1")))
+
+    def test_readers_run_while_save_encodes(self):
+        st = State()
+        read = []
+        to_dict = State.to_dict
+
+        def record(obj):
+            reader = threading.Thread(
+                target=lambda: read.append(self.storage.get(State, st.id)))
+            reader.start()
+            reader.join(5)
+            read.append(reader.is_alive())
+            return to_dict(obj)
+        with patch.object(State, "to_dict", record):
+            self.storage.save()
+        self.assertEqual([st, False], read)
+
+
+class TestFileStorageProcesses(unittest.TestCase):
+    """Unittests for testing FileStorage shared by several processes."""
+
+    files = ("file.json", "file.json.log", "file.json.log.old")
+
+    def setUp(self):
+        for name in self.files:
+            try:
+                os.rename(name, name + ".tmp")
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+        self.st = State()
+        self.st.name = "Lagos"
+        self.us = User()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        for name in self.files:
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename(name + ".tmp", name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def other_process(self, code, journal=False):
+        """Run code in another process sharing file.json."""
+        env = dict(os.environ, HBNB_STORAGE_JOURNAL="1" if journal else "0")
+        subprocess.run([sys.executable, "-c",
+                        "from models import storage\n"
+                        "from models.state import State\n" + code],
+                       env=env, check=True)
+
+    def test_refresh_applies_changes(self):
+        storage = FileStorage()
+        storage.reload()
+        self.other_process(
+            "st = storage.get(State, {!r})\n"
+            "st.name = 'Abuja'\n"
+            "storage.delete(storage.get('User', {!r}))\n"
+            "State().name = 'Kano'\n"
+            "storage.save()\n".format(self.st.id, self.us.id))
+        storage.refresh()
+        self.assertEqual("Abuja", storage.get(State, self.st.id).name)
+        self.assertIsNone(storage.get(User, self.us.id))
+        self.assertEqual(["Abuja", "Kano"], sorted(
+            st.name for st in storage.all(State).values()))
+
+    def test_save_keeps_changes_of_others(self):
+        storage = FileStorage()
+        storage.reload()
+        self.other_process("State().name = 'Kano'\nstorage.save()\n")
+        storage.get(State, self.st.id).name = "Abuja"
+        storage.save()
+        with open("file.json", "r") as f:
+            names = sorted(obj.get("name") for obj in json.load(f).values()
+                           if obj["__class__"] == "State")
+        self.assertEqual(["Abuja", "Kano"], names)
+
+    def test_unsaved_changes_win(self):
+        storage = FileStorage()
+        storage.reload()
+        st = storage.get(State, self.st.id)
+        st.name = "Abuja"
+        self.other_process(
+            "storage.get(State, {!r}).name = 'Kano'\n"
+            "storage.save()\n".format(self.st.id))
+        storage.refresh()
+        self.assertIs(st, storage.get(State, self.st.id))
+        self.assertEqual("Abuja", st.name)
+
+    def test_lock_file_created_by_writers_only(self):
+        root = os.path.dirname(os.path.dirname(
+            os.path.abspath(models.__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            subprocess.run([sys.executable, "-c",
+                            "from models import storage\n"
+                            "storage.refresh()\n"],
+                           cwd=tmp_dir, env=env, check=True)
+            self.assertEqual([], os.listdir(tmp_dir))
+            subprocess.run([sys.executable, "-c",
+                            "from models import storage\n"
+                            "storage.save()\n"],
+                           cwd=tmp_dir, env=env, check=True)
+            self.assertIn("file.json.lock", os.listdir(tmp_dir))
+
+    def test_journal_refresh_reads_new_records(self):
+        storage = FileStorage(journal=True)
+        storage.reload()
+        self.other_process("State().name = 'Kano'\nstorage.save()\n",
+                           journal=True)
+        with patch.object(FileStorage, "_FileStorage__merge_all") as merge:
+            storage.refresh()
+        merge.assert_not_called()
+        self.assertEqual(2, storage.count(State))
+        storage.refresh()
+        self.assertEqual(2, storage.count(State))
+
+
+class TestFileStorageParallelReload(unittest.TestCase):
+    """Unittests for testing the parallel reload of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.objs = [State(), User(), Place(), City()]
+        self.objs[0].name = "Lagos"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_reload_with_workers(self):
+        FileStorage(workers=2).reload()
+        objs = FileStorage._FileStorage__objects
+        self.assertEqual(len(self.objs), len(objs))
+        for obj in self.objs:
+            loaded = objs["{}.{}".format(type(obj).__name__, obj.id)]
+            self.assertEqual(type(obj), type(loaded))
+            self.assertEqual(obj.to_dict(), loaded.to_dict())
+
+    def test_import_with_workers(self):
+        env = dict(os.environ, HBNB_STORAGE_WORKERS="2")
+        with tempfile.TemporaryFile("w+") as out:
+            proc = subprocess.Popen(
+                [sys.executable, "-c",
+                 "import sys\n"
+                 "forks = []\n"
+                 "sys.addaudithook(lambda event, args:"
+                 " event == 'os.fork' and forks.append(args))\n"
+                 "import models\n"
+                 "print(len(models.storage.all()), len(forks))"],
+                env=env, stdout=out, start_new_session=True)
+            try:
+                proc.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)  # And any worker
+                proc.wait()
+                self.fail("import models hung")
+            out.seek(0)
+            self.assertEqual("{} 2".format(len(self.objs)),
+                             out.read().strip())
+
+    def test_reload_with_workers_one_line_file(self):
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        with open("file.json", "w") as f:
+            json.dump(saved, f)
+        FileStorage(workers=2).reload()
+        self.assertEqual(len(self.objs),
+                         len(FileStorage._FileStorage__objects))
+
+    def test_reload_with_workers_indented_file(self):
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        with open("file.json", "w") as f:
+            json.dump(saved, f, indent=4)
+        FileStorage(workers=2).reload()
+        self.assertEqual(len(self.objs),
+                         len(FileStorage._FileStorage__objects))
+
+    def test_lazy_save_of_indented_file(self):
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        with open("file.json", "w") as f:
+            json.dump(saved, f, indent=4)
+        storage = FileStorage(lazy=True)
+        storage.reload()
+        storage.get(State, self.objs[0].id).name = "Abuja"
+        storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(len(self.objs) + 2, len(f.readlines()))
+        FileStorage._FileStorage__objects = {}
+        FileStorage(workers=2).reload()
+        objs = FileStorage._FileStorage__objects
+        self.assertEqual(len(self.objs), len(objs))
+        self.assertEqual("Abuja", objs["State." + self.objs[0].id].name)
+
+    def test_ranges_cover_every_line_once(self):
+        size = os.path.getsize("file.json")
+        for step in range(1, size + 1):
+            keys = []
+            for start in range(0, size, step):
+                keys.extend(key for key, obj in load_snapshot_range(
+                    "file.json", start, start + step))
+            self.assertEqual(len(self.objs), len(keys))
+            self.assertEqual(len(self.objs), len(set(keys)))
+
+
+class TestIterJsonMembers(unittest.TestCase):
+    """Unittests for testing the streaming JSON object reader."""
+
+    def test_members_across_chunks(self):
+        data = {"k{}".format(i): {"n": i, "t": "a}b" * i} for i in range(50)}
+        for text in (json.dumps(data), json.dumps(data, indent=2)):
+            for size in (1, 5, 4096):
+                members = iter_json_members(io.StringIO(text), size)
+                self.assertEqual(data, dict(members))
+
+    def test_numbers_cut_by_chunk(self):
+        members = iter_json_members(io.StringIO('{"a": 12345}'), 2)
+        self.assertEqual([("a", 12345)], list(members))
+
+    def test_empty_object(self):
+        self.assertEqual([], list(iter_json_members(io.StringIO(" {} "))))
+
+    def test_invalid_json(self):
+        for text in ("", "[1]", '{"a": {}', '{"a" {}}', '{"a": {}x}'):
+            with self.assertRaises(ValueError):
+                list(iter_json_members(io.StringIO(text), 4))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,6 +5,7 @@ Unittest classes:
     TestPlace_instantiation
     TestPlace_save
     TestPlace_to_dict
+    TestPlace_from_dict
 """
 import os
 import models
@@ -245,5 +246,46 @@ class TestPlace_to_dict(unittest.TestCase):
             pl.to_dict(None)
 
 
+
+class TestPlace_from_dict(unittest.TestCase):
+    """Unittests for testing from_dict method of the Place class."""
+
+    def test_round_trip(self):
+        pl = Place()
+        pl.name = "Lekki"
+        pl.amenity_ids = ["a1"]
+        copy = Place.from_dict(pl.to_dict())
+        self.assertEqual(Place, type(copy))
+        self.assertEqual(pl.to_dict(), copy.to_dict())
+        self.assertEqual(pl.created_at, copy.created_at)
+
+    def test_not_stored(self):
+        pl = Place.from_dict({"id": "345", "__class__": "Place"})
+        self.assertNotIn("Place.345", models.storage.all())
+        self.assertNotIn("__class__", pl.__dict__)
+
+    def test_missing_attributes_get_defaults(self):
+        pl = Place.from_dict({"id": "345"})
+        other = Place.from_dict({"id": "678"})
+        self.assertEqual(0, pl.number_rooms)
+        self.assertEqual([], pl.amenity_ids)
+        self.assertIsNot(pl.amenity_ids, other.amenity_ids)
+
+    def test_timestamp_without_microseconds(self):
+        pl = Place.from_dict({"id": "345",
+                              "created_at": "2017-09-28T21:05:54",
+                              "updated_at": "2017-09-28T21:05:54.119427"})
+        self.assertEqual(datetime(2017, 9, 28, 21, 5, 54), pl.created_at)
+        self.assertEqual(119427, pl.updated_at.microsecond)
+
+    def test_legacy_values_coerced(self):
+        pl = Place.from_dict({"id": "345", "price_by_night": "100",
+                              "latitude": "6.5", "longitude": 3,
+                              "max_guest": "many"})
+        self.assertEqual(100, pl.price_by_night)
+        self.assertEqual(6.5, pl.latitude)
+        self.assertIs(float, type(pl.longitude))
+        self.assertEqual("many", pl.max_guest)
+
 if __name__ == "__main__":
     unittest.main()